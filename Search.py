@@ -1,52 +1,228 @@
 import os
+import math
+import asyncio
+import atexit
+import gzip
+import importlib
+import importlib.util
+import shutil
+import hashlib
+import heapq
+import sqlite3
+import uuid
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import re
 import time
 import logging
+import logging.handlers
 import random
-from typing import Dict, List, Any, Optional
+import queue
+import threading
+from typing import Dict, List, Any, Optional, Callable, Awaitable, Iterable, Iterator, Union
+from collections import deque
 from dataclasses import dataclass
-from bs4 import BeautifulSoup
-from urllib.parse import quote_plus
-from tenacity import retry, stop_after_attempt, wait_exponential
-from datetime import datetime
+from functools import lru_cache
+from contextlib import asynccontextmanager, closing
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+from urllib.parse import quote_plus, parse_qs, urlparse
+from datetime import datetime, timezone
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import os
-import json
-import logging
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from groq import Groq
-# Initialize FastAPI app and logger
-app = FastAPI()
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, ValidationError
+
+from gazetteer import GAZETTEER_PATH, Gazetteer, Place
+from job_fields import FIELD_NORMALIZER
+
+# undetected_chromedriver, selenium, bs4, groq and tenacity are imported inside the
+# components that use them, and preloaded by the startup warm-up.
+HEAVY_MODULES = [
+    "undetected_chromedriver",
+    "selenium.webdriver.common.by",
+    "selenium.webdriver.common.keys",
+    "selenium.webdriver.support.ui",
+    "selenium.webdriver.support.expected_conditions",
+    "bs4",
+    "groq",
+    "tenacity",
+]
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("job_scraper.log"),
-        logging.StreamHandler()
-    ]
-)
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records as-is so message formatting happens on the listener thread, not the caller"""
+
+    def prepare(self, record):
+        return record
+
+
+LOG_LISTENER = None
+
+# Fraction of per-job and per-batch log lines that are actually emitted, lower it to sample them under load
+JOB_LOG_SAMPLE_RATE = float(os.getenv("JOB_LOG_SAMPLE_RATE", "1.0"))
+
+
+def setup_logging(level: int = logging.INFO, log_file: str = "job_scraper.log"):
+    """Send every log record through a queue to a background listener that owns the file and console handlers"""
+    global LOG_LISTENER
+    if LOG_LISTENER is not None:
+        return
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(log_file)
+    stream_handler = logging.StreamHandler()
+    file_handler.setFormatter(formatter)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(DeferredQueueHandler(log_queue))
+
+    LOG_LISTENER = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    LOG_LISTENER.start()
+    atexit.register(LOG_LISTENER.stop)
+
+
+def log_job(log: logging.Logger, msg: str, *args):
+    """Log a per-job or per-batch line for a sampled fraction of calls"""
+    if JOB_LOG_SAMPLE_RATE >= 1 or random.random() < JOB_LOG_SAMPLE_RATE:
+        log.info(msg, *args)
+
+
+setup_logging()
 logger = logging.getLogger("JobScraper")
 
 
+# ==================== SHARED RESOURCES ====================
+
+HTTP_SESSION = None
+HTTP_SESSION_LOCK = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Process-wide pooled HTTP session, so keep-alive connections outlive a single search"""
+    global HTTP_SESSION
+    with HTTP_SESSION_LOCK:
+        if HTTP_SESSION is None:
+            HTTP_SESSION = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+            HTTP_SESSION.mount("https://", adapter)
+            HTTP_SESSION.mount("http://", adapter)
+        return HTTP_SESSION
+
+
+class DriverPool:
+    """Chrome instances started ahead of time so a search does not wait for browser startup"""
+
+    def __init__(self):
+        self.logger = logging.getLogger("DriverPool")
+        self.lock = threading.Lock()
+        self.idle: Dict[str, List[Any]] = {}
+        # How many idle browsers to keep per scraper once prewarm() has been called for it
+        self.targets: Dict[str, int] = {}
+        # Browsers being started in the background to top the idle ones back up
+        self.refilling: Dict[str, int] = {}
+
+    def _start(self, name: str, options_factory: Callable[[], Any]):
+        import undetected_chromedriver as uc
+        try:
+            return uc.Chrome(options=options_factory())
+        except Exception as e:
+            self.logger.error("Failed to start Chrome for %s: %s", name, e)
+            return None
+
+    def prewarm(self, name: str, options_factory: Callable[[], Any], count: int = 1) -> int:
+        """Start browsers for a scraper and keep that many idle from now on"""
+        with self.lock:
+            self.targets[name] = count
+        started = 0
+        for _ in range(count):
+            driver = self._start(name, options_factory)
+            if driver:
+                with self.lock:
+                    self.idle.setdefault(name, []).append(driver)
+                started += 1
+        return started
+
+    def acquire(self, name: str, options_factory: Callable[[], Any]):
+        """Take a warm browser if one is idle, otherwise start one. Returns None on failure"""
+        with self.lock:
+            idle = self.idle.get(name)
+            driver = idle.pop() if idle else None
+            # Count refills already under way, or every acquire in a burst would start another browser
+            refill = len(self.idle.get(name, [])) + self.refilling.get(name, 0) < self.targets.get(name, 0)
+            if refill:
+                self.refilling[name] = self.refilling.get(name, 0) + 1
+
+        if refill:
+            threading.Thread(target=self._refill, args=(name, options_factory), daemon=True).start()
+        if driver and self._alive(name, driver):
+            return driver
+        return self._start(name, options_factory)
+
+    def _alive(self, name: str, driver) -> bool:
+        """Whether an idle browser still answers, a crashed one is quit so it gets replaced"""
+        try:
+            driver.current_url
+            return True
+        except Exception as e:
+            self.logger.warning("Idle %s browser is dead, starting a new one: %s", name, e)
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return False
+
+    def _refill(self, name: str, options_factory: Callable[[], Any]):
+        driver = self._start(name, options_factory)
+        with self.lock:
+            self.refilling[name] -= 1
+            idle = self.idle.setdefault(name, [])
+            # The pool may have been closed or topped up meanwhile, don't keep browsers beyond the target
+            if driver and len(idle) < self.targets.get(name, 0):
+                idle.append(driver)
+                driver = None
+        if driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def close(self):
+        """Quit every idle browser"""
+        with self.lock:
+            drivers = [d for idle in self.idle.values() for d in idle]
+            self.idle.clear()
+            self.targets.clear()
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+DRIVER_POOL = DriverPool()
+
+
 # ==================== LINKEDIN SCRAPER ====================
 
+# Longest wait a rate limited detail fetch honors, whatever Retry-After asks for
+MAX_RETRY_AFTER_SECONDS = float(os.getenv("MAX_RETRY_AFTER_SECONDS", "30"))
+
+
 class LinkedInJobScraper:
-    def __init__(self):
+    def __init__(self, max_workers: int = 8, page_window: int = 3):
         self.logger = logging.getLogger("LinkedIn")
 
         self.base_url = "https://www.linkedin.com/jobs/search"
+        self.page_size = 25
+        # Search pages prefetched ahead of the one being parsed, and concurrent detail fetches
+        self.page_window = page_window
+        self.max_workers = max_workers
+        # time.monotonic() deadline of the search being scraped, rate limit waits never run past it
+        self.deadline = None
 
         # Updated experience map with more detailed information
         self.experience_map = {
@@ -79,6 +255,8 @@ class LinkedInJobScraper:
             "Cache-Control": "max-age=0"
         }
 
+        self.session = get_http_session()
+
     def _encode_params(self, params: Dict) -> str:
         return "&".join([f"{k}={quote_plus(str(v))}" for k, v in params.items() if v])
 
@@ -105,16 +283,19 @@ class LinkedInJobScraper:
             "years": "Not specified"
         })
 
-    def _build_search_url(self, criteria: Dict) -> tuple:
+    def _build_search_url(self, criteria: Dict, start: int = 0, newest_first: bool = False) -> tuple:
         """Build search URL with parameters and return URL and experience level"""
-        exp_level = self._map_experience_level(criteria.get("experience", "2 years"))
+        experience = criteria.get("experience", "2 years")
+        # Empty experience leaves the level filter off, used when one scrape serves several searches
+        exp_level = self._map_experience_level(experience) if experience else ""
         params = {
             "keywords": criteria.get("position", ""),
             "location": criteria.get("location", ""),
             "f_E": exp_level,
             "f_WT": self.job_type_map.get(criteria.get("jobNature", "onsite").lower(), "1"),
-            "pageNum": "0",
-            "start": "0"
+            "start": str(start),
+            # Newest first, so once a whole page is already known the pages after it are too
+            "sortBy": "DD" if newest_first else ""
         }
 
         encoded_params = self._encode_params(params)
@@ -139,9 +320,9 @@ class LinkedInJobScraper:
                 "source": "LinkedIn",
                 "experience_level": experience_info["level"],
                 "experience_years": experience_info["years"],
-                "job_nature": criteria.get("jobNature", ""),
+                "job_nature": "Not specified",
                 "posted_date": "",
-                "salary": criteria.get("salary", "Not specified")
+                "salary": "Not specified"
             }
 
             # Extract company name
@@ -160,19 +341,34 @@ class LinkedInJobScraper:
                 job_data["job_id"] = job_id
 
             # Try to extract posting date
-            date_element = job_element.find("time", class_="job-search-card__listdate")
+            date_element = job_element.find("time")
             if date_element:
                 job_data["posted_date"] = date_element.get_text(strip=True)
 
             return job_data
         except Exception as e:
-            self.logger.error(f"Error extracting job data: {str(e)}")
+            self.logger.error("Error extracting job data: %s", e)
             return None
 
     def _get_job_description(self, job_url: str) -> Dict:
         """Fetch detailed job description and criteria from job page"""
+        from bs4 import BeautifulSoup
         try:
-            response = requests.get(job_url, headers=self.headers, timeout=10)
+            max_retries = 4
+            for attempt in range(max_retries):
+                response = self.session.get(job_url, headers=self.headers, timeout=10)
+                if response.status_code != 429 or attempt == max_retries - 1:
+                    break
+                # Concurrent detail fetches get rate limited, back off instead of dropping the description
+                retry_after = response.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else 2 ** attempt + random.uniform(0, 1)
+                delay = min(delay, MAX_RETRY_AFTER_SECONDS)
+                remaining = time_left(self.deadline)
+                if remaining is not None and delay >= remaining:
+                    self.logger.warning("LinkedIn rate limited %s past the search deadline, giving up", job_url)
+                    break
+                self.logger.warning("LinkedIn rate limited %s, retrying in %.1fs", job_url, delay)
+                time.sleep(delay)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'html.parser')
 
@@ -202,92 +398,191 @@ class LinkedInJobScraper:
             return details
 
         except Exception as e:
-            self.logger.error(f"Error fetching job description from {job_url}: {str(e)}")
+            self.logger.error("Error fetching job description from %s: %s", job_url, e)
             return {"description": "", "job_criteria": {}}
 
-    def search_jobs(self, criteria: Dict, max_results: int = 25) -> List[Dict]:
-        jobs_found = []
-        page = 0
-
+    def _fetch_page(self, url: str) -> Optional[str]:
+        """Fetch a search results page with retries, returns None on failure"""
+        max_retries = 3
+        for attempt in range(max_retries):
+            try:
+                response = self.session.get(url, headers=self.headers, timeout=10)
+                response.raise_for_status()
+                return response.text
+            except requests.RequestException as e:
+                if attempt == max_retries - 1:
+                    self.logger.error("Failed to fetch results after %s attempts: %s", max_retries, e)
+                    return None
+                time.sleep(2 ** attempt)
+
+    def _hydrate_job(self, job_data: Dict) -> Dict:
+        """Merge the detail page into a job card and standardize field names"""
+        log_job(self.logger, "Fetching description for job: %s", job_data['title'])
+        job_details = self._get_job_description(job_data['link'])
+
+        # Merge job details with job data
+        job_data.update(job_details)
+
+        # Standardize field names for merging
+        job_data["job_title"] = job_data.pop("title")
+        job_data["apply_link"] = job_data.pop("link")
+        job_data["experience"] = job_data.pop("experience_years")
+        job_data["jobNature"] = job_data.pop("job_nature")
+        return FIELD_NORMALIZER.normalize(job_data)
+
+    def _hydrated_result(self, future) -> Optional[Dict]:
         try:
-            self.logger.info(
-                f"Starting LinkedIn job search for {criteria.get('position')} in {criteria.get('location')}")
+            return future.result()
+        except Exception as e:
+            self.logger.error("Error hydrating LinkedIn job: %s", e)
+            return None
 
-            while len(jobs_found) < max_results:
-                # Get URL and experience level
-                url, exp_level = self._build_search_url(criteria)
-                if page > 0:
-                    url += f"&start={page * 25}"
+    def iter_jobs(self, criteria: Dict, max_results: int = 25, watermark=None,
+                  deadline: Optional[float] = None) -> Iterator[Dict]:
+        """
+        Yield hydrated jobs in search order as soon as their detail pages arrive.
+        With a watermark from an earlier crawl, known postings are skipped and paging stops at a page of them.
+        """
+        from bs4 import BeautifulSoup
+        self.deadline = deadline
+        incremental = watermark is not None and watermark.has_history
+        detail_futures = deque()
+        pending_pages = {}
+        submitted = 0
+        found = 0
+        seen_job_ids = set()
+        # Leave room for pages that are mostly duplicates of earlier ones
+        max_pages = math.ceil(max_results / self.page_size) + self.page_window
+
+        self.logger.info(
+            "Starting LinkedIn job search for %s in %s", criteria.get('position'), criteria.get('location'))
+
+        with ThreadPoolExecutor(max_workers=self.page_window) as page_pool, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as detail_pool:
+            try:
+                try:
+                    next_page = 0
+                    page = 0
+
+                    while page < max_pages and submitted < max_results and time_left(deadline) != 0:
+                        # Keep up to page_window result pages in flight ahead of the one being parsed,
+                        # but no more than the remaining results can fill
+                        window = min(self.page_window, math.ceil((max_results - submitted) / self.page_size))
+                        while next_page < max_pages and next_page - page < max(1, window):
+                            url, exp_level = self._build_search_url(
+                                criteria, start=next_page * self.page_size, newest_first=incremental)
+                            pending_pages[next_page] = page_pool.submit(self._fetch_page, url)
+                            next_page += 1
+
+                        self.logger.info("Fetching page %s from LinkedIn...", page + 1)
+                        html = pending_pages.pop(page).result()
+                        if html is None:
+                            break
 
-                self.logger.info(f"Fetching page {page + 1} from LinkedIn...")
+                        soup = BeautifulSoup(html, 'html.parser')
+                        job_cards = soup.find_all("div", class_="base-card")
 
-                # Make request with retry mechanism
-                max_retries = 3
-                for attempt in range(max_retries):
-                    try:
-                        response = requests.get(url, headers=self.headers, timeout=10)
-                        response.raise_for_status()
-                        break
-                    except requests.RequestException as e:
-                        if attempt == max_retries - 1:
-                            self.logger.error(f"Failed to fetch results after {max_retries} attempts: {str(e)}")
-                            return jobs_found
-                        time.sleep(2 ** attempt)
+                        if not job_cards:
+                            self.logger.info("No more jobs found on LinkedIn.")
+                            break
 
-                soup = BeautifulSoup(response.text, 'html.parser')
-                job_cards = soup.find_all("div", class_="base-card")
+                        listed = 0
+                        known = 0
+                        for job_card in job_cards:
+                            job_data = self._extract_job_data(job_card, exp_level, criteria)
+                            if not job_data:
+                                continue
+
+                            job_id = job_data["job_id"] or job_data["link"]
+                            if job_id in seen_job_ids:
+                                continue
+                            seen_job_ids.add(job_id)
+                            listed += 1
+
+                            if incremental and watermark.is_known(job_data):
+                                known += 1
+                                continue
+
+                            # Hydrate details in the background while the next pages are parsed
+                            detail_futures.append(detail_pool.submit(self._hydrate_job, job_data))
+                            submitted += 1
+                            if submitted >= max_results:
+                                break
 
-                if not job_cards:
-                    self.logger.info("No more jobs found on LinkedIn.")
-                    break
+                        # Hand over whatever is already hydrated before parsing the next page
+                        while detail_futures and detail_futures[0].done():
+                            job = self._hydrated_result(detail_futures.popleft())
+                            if job:
+                                found += 1
+                                yield job
 
-                for job_card in job_cards:
-                    job_data = self._extract_job_data(job_card, exp_level, criteria)
-                    if job_data:
-                        # Fetch detailed job description
-                        self.logger.info(f"Fetching description for job: {job_data['title']}")
-                        job_details = self._get_job_description(job_data['link'])
+                        if len(job_cards) < self.page_size:
+                            break
 
-                        # Merge job details with job data
-                        job_data.update(job_details)
+                        if listed and known == listed:
+                            # Earlier crawls may have skipped postings between known ones, so only a page
+                            # that is entirely known shows the rest was seen before
+                            self.logger.info("Page %s of LinkedIn postings is all known, stopping", page + 1)
+                            break
 
-                        # Standardize field names for merging
-                        job_data["job_title"] = job_data.pop("title")
-                        job_data["apply_link"] = job_data.pop("link")
-                        job_data["experience"] = job_data.pop("experience_years")
+                        page += 1
 
-                        jobs_found.append(job_data)
-                        if len(jobs_found) >= max_results:
-                            break
+                except Exception as e:
+                    self.logger.error("Error during LinkedIn job search: %s", e)
 
-                        # Add delay between job detail requests
-                        time.sleep(1)
+                for pending in pending_pages.values():
+                    pending.cancel()
 
-                if len(job_cards) < 25:
-                    break
+                while detail_futures:
+                    job = self._hydrated_result(detail_futures.popleft())
+                    if job:
+                        found += 1
+                        yield job
 
-                page += 1
-                time.sleep(1)
+            finally:
+                # The consumer may stop early, don't leave queued fetches running
+                for future in list(pending_pages.values()) + list(detail_futures):
+                    future.cancel()
 
-        except Exception as e:
-            self.logger.error(f"Error during LinkedIn job search: {str(e)}")
+        self.logger.info("LinkedIn search completed. Found %s jobs.", found)
 
-        self.logger.info(f"LinkedIn search completed. Found {len(jobs_found)} jobs.")
-        return jobs_found[:max_results]
+    def search_jobs(self, criteria: Dict, max_results: int = 25, watermark=None) -> List[Dict]:
+        return list(self.iter_jobs(criteria, max_results, watermark))
+
+    def close(self):
+        """Nothing to release, the HTTP session is shared"""
+        pass
 
 
 # ==================== INDEED SCRAPER ====================
 
 class IndeedScraper:
-    def __init__(self):
+    # Markers that show up on Cloudflare / hCaptcha interstitials instead of a job page
+    CHALLENGE_MARKERS = (
+        "cf-challenge",
+        "challenge-platform",
+        "cf-turnstile",
+        "h-captcha",
+        "Just a moment...",
+        "Additional Verification Required",
+    )
+
+    def __init__(self, fetch_mode: str = "hybrid", max_workers: int = 8):
 
 
         self.logger = logging.getLogger("Indeed")
         self.base_url = "https://pk.indeed.com"
+        # "browser" opens every job page in a new tab, "hybrid" fetches them over
+        # plain HTTP with the browser's session and only falls back to the tab on a challenge
+        self.fetch_mode = fetch_mode
+        self.max_workers = max_workers
+        self.session = None
         self.setup_driver()
 
-    def setup_driver(self):
-        """Initialize undetected-chromedriver"""
+    @staticmethod
+    def chrome_options():
+        """Chrome options for Indeed browsers"""
+        import undetected_chromedriver as uc
         options = uc.ChromeOptions()
         options.add_argument('--no-sandbox')
         options.add_argument('--disable-gpu')
@@ -295,14 +590,20 @@ class IndeedScraper:
         options.add_argument('--disable-popup-blocking')
         options.add_argument('--disable-dev-shm-usage')
         options.add_argument('--disable-extensions')
+        return options
+
+    def setup_driver(self):
+        """Initialize undetected-chromedriver"""
+        self.driver = DRIVER_POOL.acquire("indeed", self.chrome_options)
+        if not self.driver:
+            self.logger.error("Failed to initialize Chrome driver")
+            return
         try:
-            self.driver = uc.Chrome(options=options)
             self.driver.maximize_window()
         except Exception as e:
-            self.logger.error(f"Failed to initialize Chrome driver: {e}")
-            self.driver = None
+            self.logger.warning("Could not maximize Chrome window: %s", e)
 
-    def build_search_url(self, criteria: dict) -> str:
+    def build_search_url(self, criteria: dict, newest_first: bool = False) -> str:
         """Build Indeed search URL with parameters"""
         # Base search URL with position and location
         search_url = f"{self.base_url}/jobs?"
@@ -322,22 +623,26 @@ class IndeedScraper:
         elif job_nature == 'remote':
             search_url += "&sc=0kf%3Aattr(DSQF7)%3B"
 
-        self.logger.info(f"Built Indeed search URL: {search_url}")
+        if newest_first:
+            search_url += "&sort=date"
+
+        self.logger.info("Built Indeed search URL: %s", search_url)
         return search_url
 
     def extract_job_data(self, job_card, criteria):
         """Extract data from a single job card"""
+        from selenium.webdriver.common.by import By
         try:
             job_data = {
                 'job_title': '',
                 'company': '',
                 'location': '',
-                'salary': criteria.get('salary', 'Not specified'),
-                'jobNature': criteria.get('jobNature', 'Not specified'),
+                'salary': 'Not specified',
+                'jobNature': 'Not specified',
                 'posting_date': '',
                 'apply_link': '',
                 'source': 'Indeed',
-                'experience': criteria.get('experience', 'Not specified')
+                'experience': 'Not specified'
             }
 
             # Extract title and link
@@ -379,11 +684,14 @@ class IndeedScraper:
             return job_data
 
         except Exception as e:
-            self.logger.error(f"Error extracting Indeed job data: {e}")
+            self.logger.error("Error extracting Indeed job data: %s", e)
             return None
 
     def get_job_description(self, job_url):
         """Get detailed job description"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
         try:
             self.driver.execute_script("window.open('');")
             self.driver.switch_to.window(self.driver.window_handles[-1])
@@ -400,26 +708,124 @@ class IndeedScraper:
 
             return description
         except Exception as e:
-            self.logger.error(f"Error getting Indeed job description: {e}")
+            self.logger.error("Error getting Indeed job description: %s", e)
             if len(self.driver.window_handles) > 1:
                 self.driver.close()
                 self.driver.switch_to.window(self.driver.window_handles[0])
             return ""
 
-    def search_jobs(self, criteria: dict, num_pages: int = 1):
+    def build_http_session(self):
+        """Create a pooled HTTP session that carries the browser's cookies and user agent"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        user_agent = self.driver.execute_script("return navigator.userAgent;")
+        session.headers.update({
+            "User-Agent": user_agent,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.5",
+            "Referer": self.base_url + "/",
+        })
+
+        for cookie in self.driver.get_cookies():
+            session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain"),
+                path=cookie.get("path", "/")
+            )
 
+        self.logger.info("Built Indeed HTTP session with %s browser cookies", len(session.cookies))
+        return session
 
-        all_jobs = []
+    def is_challenge_page(self, status_code: int, html: str) -> bool:
+        """Detect bot-protection pages that only a real browser can get through"""
+        if status_code in (403, 429, 503):
+            return True
+        return any(marker in html for marker in self.CHALLENGE_MARKERS)
 
+    def fetch_job_description_http(self, job_url: str) -> Optional[str]:
+        """Get job description over HTTP, returns None when the browser is needed"""
+        from bs4 import BeautifulSoup
         try:
-            url = self.build_search_url(criteria)
-            self.logger.info(f"Starting Indeed job search at URL: {url}")
+            response = self.session.get(job_url, timeout=10)
+            soup = BeautifulSoup(response.text, 'html.parser')
+            description_elem = soup.find(id="jobDescriptionText")
+            if description_elem:
+                return description_elem.get_text(separator="\n", strip=True)
+
+            # Normal job pages load Cloudflare scripts too, so only a page without the description is a challenge
+            if self.is_challenge_page(response.status_code, response.text):
+                self.logger.info("Challenge page for %s, deferring to browser", job_url)
+                return None
+            response.raise_for_status()
+            return None
+        except Exception as e:
+            self.logger.warning("HTTP fetch failed for Indeed job %s: %s", job_url, e)
+            return None
+
+    def fetch_job_descriptions(self, jobs: List[Dict]):
+        """Fill in descriptions for a page of jobs, concurrently over HTTP when possible"""
+        pending = [job for job in jobs if job['apply_link']]
+        if not pending:
+            return
+
+        if self.fetch_mode == "hybrid":
+            if self.session is None:
+                try:
+                    self.session = self.build_http_session()
+                except Exception as e:
+                    self.logger.error("Failed to build Indeed HTTP session, using browser only: %s", e)
+                    self.fetch_mode = "browser"
+
+        if self.fetch_mode == "hybrid":
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                descriptions = list(executor.map(
+                    self.fetch_job_description_http, [job['apply_link'] for job in pending]
+                ))
+
+            fallback = []
+            for job, description in zip(pending, descriptions):
+                if description is None:
+                    fallback.append(job)
+                else:
+                    job['description'] = description
+
+            if fallback:
+                self.logger.info("Falling back to browser for %s of %s Indeed jobs", len(fallback), len(pending))
+                # The browser may have solved a challenge, pick up its fresh cookies for the next page
+                self.session.close()
+                self.session = None
+            pending = fallback
+
+        for job in pending:
+            job['description'] = self.get_job_description(job['apply_link'])
+
+    def iter_jobs(self, criteria: dict, num_pages: int = 1, watermark=None,
+                  deadline: Optional[float] = None) -> Iterator[Dict]:
+        """
+        Yield jobs page by page as soon as each page's descriptions are fetched.
+        With a watermark from an earlier crawl, known postings are skipped and paging stops at a page of them.
+        """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+
+        incremental = watermark is not None and watermark.has_history
+        found = 0
+
+        try:
+            url = self.build_search_url(criteria, newest_first=incremental)
+            self.logger.info("Starting Indeed job search at URL: %s", url)
 
             self.driver.get(url)
             time.sleep(3)  # Wait for initial page load
 
             for page in range(num_pages):
-                self.logger.info(f"Scraping Indeed page {page + 1}...")
+                self.logger.info("Scraping Indeed page %s...", page + 1)
 
                 # Wait for job cards to load
                 try:
@@ -431,15 +837,28 @@ class IndeedScraper:
                     break
 
                 # Process each job card
+                page_jobs = []
+                known = 0
                 for card in job_cards:
                     job_data = self.extract_job_data(card, criteria)
                     if job_data:
-                        # Get detailed description
-                        if job_data['apply_link']:
-                            description = self.get_job_description(job_data['apply_link'])
-                            job_data['description'] = description
-                        all_jobs.append(job_data)
-                        self.logger.info(f"Found Indeed job: {job_data['job_title']} at {job_data['company']}")
+                        if incremental and watermark.is_known(job_data):
+                            known += 1
+                            continue
+                        page_jobs.append(job_data)
+                        log_job(self.logger, "Found Indeed job: %s at %s", job_data['job_title'], job_data['company'])
+
+                # Get detailed descriptions
+                self.fetch_job_descriptions(page_jobs)
+                for job_data in page_jobs:
+                    found += 1
+                    yield FIELD_NORMALIZER.normalize(job_data)
+
+                if known and not page_jobs:
+                    self.logger.info("Page %s of Indeed postings is all known, stopping", page + 1)
+                    break
+                if time_left(deadline) == 0:
+                    break
 
                 # Try to click next page
                 try:
@@ -453,52 +872,74 @@ class IndeedScraper:
                     break
 
         except Exception as e:
-            self.logger.error(f"Error during Indeed job search: {e}")
+            self.logger.error("Error during Indeed job search: %s", e)
 
-        self.logger.info(f"Indeed search completed. Found {len(all_jobs)} jobs.")
-        return all_jobs
+        self.logger.info("Indeed search completed. Found %s jobs.", found)
+
+    def search_jobs(self, criteria: dict, num_pages: int = 1, watermark=None):
+        return list(self.iter_jobs(criteria, num_pages, watermark))
 
     def close(self):
         """Close the driver"""
+        if self.session:
+            self.session.close()
         if hasattr(self, 'driver') and self.driver:
             self.driver.quit()
 
 
 # ==================== GLASSDOOR SCRAPER ====================
 
+# Extra browsers hydrating Glassdoor details at once across every search in this process
+MAX_DETAIL_BROWSERS = int(os.getenv("MAX_DETAIL_BROWSERS", "4"))
+DETAIL_BROWSER_SLOTS = threading.BoundedSemaphore(MAX_DETAIL_BROWSERS)
+
+
 class GlassdoorScraper:
-    def __init__(self):
+    def __init__(self, max_pages: int = 3, detail_workers: int = 2):
 
 
         self.logger = logging.getLogger("Glassdoor")
         self.base_url = "https://www.glassdoor.com/Job"
+        # Result pages loaded through "Show more jobs", and extra browsers hydrating details meanwhile
+        self.max_pages = max_pages
+        self.detail_workers = detail_workers
         self.setup_driver()
 
-    def setup_driver(self):
-        """Initialize undetected-chromedriver"""
+    @staticmethod
+    def chrome_options():
+        """Chrome options for Glassdoor browsers"""
+        import undetected_chromedriver as uc
         options = uc.ChromeOptions()
         options.add_argument('--no-sandbox')
         options.add_argument('--window-size=1920,1080')
         options.add_argument('--disable-gpu')
         options.add_argument('--disable-dev-shm-usage')
         options.add_argument('--disable-extensions')
-        try:
-            self.driver = uc.Chrome(options=options)
-        except Exception as e:
-            self.logger.error(f"Failed to initialize Chrome driver: {e}")
-            self.driver = None
+        return options
 
-    def search_and_get_links(self, position: str, location: str):
-        """First phase: Search and collect all job links with basic info"""
-        if not self.driver:
-            return []
+    def create_driver(self):
+        """Get an undetected-chromedriver instance, returns None on failure"""
+        driver = DRIVER_POOL.acquire("glassdoor", self.chrome_options)
+        if not driver:
+            self.logger.error("Failed to initialize Chrome driver")
+        return driver
 
+    def setup_driver(self):
+        """Initialize undetected-chromedriver"""
+        self.driver = self.create_driver()
+
+    def open_search(self, position: str, location: str) -> bool:
+        """Run a search from the Glassdoor jobs page"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
         try:
             self.logger.info("Opening Glassdoor Jobs...")
             self.driver.get(self.base_url)
             time.sleep(5)
 
-            self.logger.info(f"Entering position: {position}")
+            self.logger.info("Entering position: %s", position)
             position_input = WebDriverWait(self.driver, 10).until(
                 EC.presence_of_element_located((By.ID, "searchBar-jobTitle"))
             )
@@ -506,7 +947,7 @@ class GlassdoorScraper:
             position_input.send_keys(position)
             time.sleep(2)
 
-            self.logger.info(f"Entering location: {location}")
+            self.logger.info("Entering location: %s", location)
             location_input = WebDriverWait(self.driver, 10).until(
                 EC.presence_of_element_located((By.ID, "searchBar-location"))
             )
@@ -516,21 +957,71 @@ class GlassdoorScraper:
 
             location_input.send_keys(Keys.RETURN)
             time.sleep(5)
+            return True
+
+        except Exception as e:
+            self.logger.error("Error opening Glassdoor search: %s", e)
+            return False
+
+    def load_more_jobs(self) -> bool:
+        """Click "Show more jobs" and wait for new cards, returns False when there are no more"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        try:
+            card_count = len(self.driver.find_elements(By.CSS_SELECTOR, "a.JobCard_jobTitle__GLyJ1"))
+            load_more = self.driver.find_element(By.CSS_SELECTOR, 'button[data-test="load-more"]')
+            self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", load_more)
+            load_more.click()
 
+            # Glassdoor pops a sign-up modal after the first extra page
+            try:
+                WebDriverWait(self.driver, 3).until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button.CloseButton"))
+                ).click()
+            except:
+                pass
+
+            WebDriverWait(self.driver, 10).until(
+                lambda d: len(d.find_elements(By.CSS_SELECTOR, "a.JobCard_jobTitle__GLyJ1")) > card_count
+            )
+            return True
+        except Exception:
+            self.logger.info("No more Glassdoor results to load")
+            return False
+
+    def search_and_get_links(self, position: str, location: str):
+        """First phase: Search and collect all job links with basic info"""
+        if not self.driver:
+            return []
+
+        if not self.open_search(position, location):
+            return []
+        return self.collect_job_cards(set())
+
+    def collect_job_cards(self, seen_links: set):
+        """Collect basic info for job cards on the results page that are not in seen_links"""
+        from selenium.webdriver.common.by import By
+        try:
             job_links = []
             try:
                 # Find all job cards
                 job_cards = self.driver.find_elements(By.CSS_SELECTOR, "a.JobCard_jobTitle__GLyJ1")
-                self.logger.info(f"Found {len(job_cards)} Glassdoor job listings")
+                self.logger.info("Found %s Glassdoor job listings", len(job_cards))
 
                 for card in job_cards:
                     try:
+                        href = card.get_attribute("href")
+                        if href in seen_links:
+                            continue
+                        seen_links.add(href)
+
                         parent_card = card.find_element(By.XPATH, "./../../..")  # Go up to main card container
 
                         # Extract basic information
                         job_data = {
                             "job_title": card.text.strip(),
-                            "apply_link": card.get_attribute("href"),
+                            "apply_link": href,
                             "company": "",
                             "location": "",
                             "description": "",
@@ -578,38 +1069,44 @@ class GlassdoorScraper:
                             job_data["easy_apply"] = "No"
 
                         job_links.append(job_data)
-                        self.logger.info(
-                            f"Collected Glassdoor link for: {job_data['job_title']} at {job_data['company']}")
+                        log_job(
+                            self.logger, "Collected Glassdoor link for: %s at %s",
+                            job_data['job_title'], job_data['company']
+                        )
 
                     except Exception as e:
-                        self.logger.error(f"Error collecting Glassdoor link data: {str(e)}")
+                        self.logger.error("Error collecting Glassdoor link data: %s", e)
                         continue
 
             except Exception as e:
-                self.logger.error(f"Error finding Glassdoor job cards: {str(e)}")
+                self.logger.error("Error finding Glassdoor job cards: %s", e)
 
             return job_links
 
         except Exception as e:
-            self.logger.error(f"Error in Glassdoor search_and_get_links: {str(e)}")
+            self.logger.error("Error in Glassdoor collect_job_cards: %s", e)
             return []
 
-    def get_job_details(self, job_data):
+    def get_job_details(self, job_data, driver=None):
         """Get detailed information for a single job"""
-        if not self.driver:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        driver = driver or self.driver
+        if not driver:
             return job_data
 
         try:
-            self.logger.info(f"Getting Glassdoor details for: {job_data['job_title']} at {job_data['company']}")
+            log_job(self.logger, "Getting Glassdoor details for: %s at %s", job_data['job_title'], job_data['company'])
 
             # Open job URL in the current window
-            self.driver.get(job_data['apply_link'])
+            driver.get(job_data['apply_link'])
             time.sleep(5)
 
             try:
                 # First, try to click the "Show More" button if it exists
                 try:
-                    show_more_button = WebDriverWait(self.driver, 5).until(
+                    show_more_button = WebDriverWait(driver, 5).until(
                         EC.presence_of_element_located((By.CLASS_NAME, "JobDetails_showMoreWrapper__ja2_y"))
                     )
                     show_more_button.click()
@@ -619,7 +1116,7 @@ class GlassdoorScraper:
                     pass
 
                 # Wait for and get the job description
-                description_elem = WebDriverWait(self.driver, 10).until(
+                description_elem = WebDriverWait(driver, 10).until(
                     EC.presence_of_element_located((By.CLASS_NAME, "JobDetails_jobDescription__uW_fK"))
                 )
 
@@ -629,68 +1126,169 @@ class GlassdoorScraper:
                 # Update job data with the complete description
                 job_data['description'] = full_description
 
-                # Try to extract experience
+                # Extract experience, salary and job nature
                 job_data['experience'] = "Not specified"
                 job_data['jobNature'] = "Not specified"
-                for term in ["years of experience", "year experience", "years experience"]:
-                    if term in full_description.lower():
-                        # Look for phrases like "2+ years of experience" or "2-3 years experience"
-                        for i in range(15):
-                            if f"{i}+" in full_description or f"{i}-" in full_description or f"{i} " in full_description:
-                                job_data['experience'] = f"{i} years"
-                                break
-
-                # Try to detect job nature
-                if "remote" in full_description.lower():
-                    job_data['jobNature'] = "remote"
-                elif "hybrid" in full_description.lower():
-                    job_data['jobNature'] = "hybrid"
-                elif "on-site" in full_description.lower() or "onsite" in full_description.lower():
-                    job_data['jobNature'] = "onsite"
-
-                return job_data
+                return FIELD_NORMALIZER.normalize(job_data)
 
             except Exception as e:
-                self.logger.error(f"Error getting Glassdoor job description: {str(e)}")
+                self.logger.error("Error getting Glassdoor job description: %s", e)
                 return job_data
 
         except Exception as e:
-            self.logger.error(f"Error accessing Glassdoor job page: {str(e)}")
+            self.logger.error("Error accessing Glassdoor job page: %s", e)
             return job_data
 
-    def search_jobs(self, criteria: Dict):
+    def fill_missing_fields(self, job_details: Dict) -> Dict:
+        """Mark fields the posting did not mention, the searcher's own criteria say nothing about the job"""
+        if 'experience' not in job_details or not job_details['experience']:
+            job_details['experience'] = 'Not specified'
+        if 'jobNature' not in job_details or not job_details['jobNature']:
+            job_details['jobNature'] = 'Not specified'
+        return job_details
 
+    def detail_worker(self, driver, job_queue: queue.Queue, detailed_queue: queue.Queue):
+        """Hydrate queued jobs on a dedicated driver until a None sentinel arrives, then send one back"""
         try:
-            position = criteria.get("position", "")
-            location = criteria.get("location", "")
+            while True:
+                job_data = job_queue.get()
+                if job_data is None:
+                    break
+                try:
+                    job_details = self.get_job_details(job_data, driver)
+                    if job_details:
+                        detailed_queue.put(self.fill_missing_fields(job_details))
+                except Exception as e:
+                    self.logger.error("Error in Glassdoor detail worker: %s", e)
+                time.sleep(2)
+        finally:
+            detailed_queue.put(None)
 
-            # Phase 1: Get all job links with basic info
-            self.logger.info("Phase 1: Collecting Glassdoor job links...")
-            job_links = self.search_and_get_links(position, location)
-            self.logger.info(f"Collected {len(job_links)} Glassdoor job links")
+    def iter_jobs(self, criteria: Dict, watermark=None, deadline: Optional[float] = None) -> Iterator[Dict]:
+        """
+        Yield jobs as their details are hydrated, while later result pages are still loading.
+        With a watermark from an earlier crawl, known postings are not hydrated again.
+        """
+        if not self.driver:
+            return
 
-            # Phase 2: Get complete description for each job
-            self.logger.info("Phase 2: Getting detailed information for each Glassdoor job...")
-            detailed_jobs = []
+        incremental = watermark is not None and watermark.has_history
+        detail_drivers = []
+        detail_slots = 0
+        workers = []
+        job_queue = queue.Queue()
+        detailed_queue = queue.Queue()
+        found = 0
+        try:
+            deferred_jobs = []
+            try:
+                position = criteria.get("position", "")
+                location = criteria.get("location", "")
+
+                # Searches share a process-wide cap on these browsers. A search left without any
+                # hydrates its details on the search browser once paging is done.
+                while detail_slots < self.detail_workers and DETAIL_BROWSER_SLOTS.acquire(blocking=False):
+                    detail_slots += 1
+                if detail_slots < self.detail_workers:
+                    self.logger.info("Only %s of %s Glassdoor detail browsers free", detail_slots, self.detail_workers)
+
+                # Start the detail browsers while the search page loads
+                with ThreadPoolExecutor(max_workers=max(detail_slots, 1)) as executor:
+                    driver_futures = [executor.submit(self.create_driver) for _ in range(detail_slots)]
+                    search_opened = self.open_search(position, location)
+                    detail_drivers = [d for d in (f.result() for f in driver_futures) if d]
+
+                if not search_opened:
+                    return
+
+                workers = [
+                    threading.Thread(
+                        target=self.detail_worker,
+                        args=(driver, job_queue, detailed_queue),
+                        daemon=True
+                    )
+                    for driver in detail_drivers
+                ]
+                for worker in workers:
+                    worker.start()
+                self.logger.info("Hydrating Glassdoor details on %s extra browsers", len(workers))
+
+                # Page through results, details are hydrated as soon as each page is collected
+                seen_links = set()
+                for page in range(self.max_pages):
+                    job_links = self.collect_job_cards(seen_links)
+                    self.logger.info("Collected %s Glassdoor job links from page %s", len(job_links), page + 1)
+                    if incremental:
+                        collected = len(job_links)
+                        job_links = [job_data for job_data in job_links if not watermark.is_known(job_data)]
+                        if collected and not job_links:
+                            # Results are not date ordered, only give up once a whole page is old
+                            self.logger.info("No new Glassdoor postings on page %s, stopping", page + 1)
+                            break
+                    for job_data in job_links:
+                        if workers:
+                            job_queue.put(job_data)
+                        else:
+                            deferred_jobs.append(job_data)
+
+                    # Hand over what is already hydrated before loading the next page
+                    while True:
+                        try:
+                            job_details = detailed_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if job_details is not None:
+                            found += 1
+                            yield job_details
+
+                    if page + 1 >= self.max_pages or time_left(deadline) == 0 or not self.load_more_jobs():
+                        break
+
+            except Exception as e:
+                self.logger.error("Error in Glassdoor scrape_jobs: %s", e)
+
+            for _ in workers:
+                job_queue.put(None)
+            running = len(workers)
+            while running:
+                job_details = detailed_queue.get()
+                if job_details is None:
+                    running -= 1
+                else:
+                    found += 1
+                    yield job_details
 
-            for job_data in job_links:
+            # Without extra browsers, hydrate on the search driver once paging is done
+            for job_data in deferred_jobs:
                 job_details = self.get_job_details(job_data)
                 if job_details:
-                    # Add any missing fields from criteria
-                    if 'experience' not in job_details or not job_details['experience']:
-                        job_details['experience'] = criteria.get('experience', 'Not specified')
-                    if 'jobNature' not in job_details or not job_details['jobNature']:
-                        job_details['jobNature'] = criteria.get('jobNature', 'Not specified')
-
-                    detailed_jobs.append(job_details)
+                    found += 1
+                    yield self.fill_missing_fields(job_details)
                 time.sleep(2)
 
-            self.logger.info(f"Glassdoor search completed. Found {len(detailed_jobs)} jobs.")
-            return detailed_jobs
+            self.logger.info("Glassdoor search completed. Found %s jobs.", found)
 
-        except Exception as e:
-            self.logger.error(f"Error in Glassdoor scrape_jobs: {str(e)}")
-            return []
+        finally:
+            # Drop work nobody will consume if the caller stopped early, then stop the workers
+            while True:
+                try:
+                    job_queue.get_nowait()
+                except queue.Empty:
+                    break
+            for _ in workers:
+                job_queue.put(None)
+            for worker in workers:
+                worker.join()
+            for driver in detail_drivers:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+            for _ in range(detail_slots):
+                DETAIL_BROWSER_SLOTS.release()
+
+    def search_jobs(self, criteria: Dict, watermark=None):
+        return list(self.iter_jobs(criteria, watermark))
 
     def close(self):
         """Close the driver"""
@@ -700,30 +1298,8 @@ class GlassdoorScraper:
 
 # ==================== GROQ CLIENT ====================
 
-import logging
-import os
-import json
-import re
-from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
-from tenacity import retry, stop_after_attempt, wait_exponential
-
-# Assuming groq library is installed and available
-try:
-    from groq import Groq
-
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
-
-
-    class Groq:
-        pass
-
-# --- Setup Logger ---
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
+# Checked without importing, the groq package itself is loaded when a client is built
+GROQ_AVAILABLE = importlib.util.find_spec("groq") is not None
 
 # --- Groq Related Classes ---
 class GroqAPIError(Exception):
@@ -731,13 +1307,63 @@ class GroqAPIError(Exception):
     pass
 
 
+class CompletionTruncated(GroqAPIError):
+    """A JSON mode answer was cut off by the output token cap."""
+    pass
+
+
 @dataclass
 class GroqConfig:
-    model: str = "deepseek-r1-distill-llama-70b"
+    model: str = os.getenv("GROQ_MODEL", "deepseek-r1-distill-llama-70b")
     temperature: float = 0.5
     max_tokens: int = 8000
     top_p: float = 0.9
     stream: bool = False
+    # Point at a local stub server to run without the real API
+    base_url: Optional[str] = os.getenv("GROQ_BASE_URL") or None
+    # Small model that screens every batch first, empty sends all jobs straight to model
+    screen_model: str = os.getenv("GROQ_SCREEN_MODEL", "llama-3.1-8b-instant")
+    screen_max_tokens: int = 1024
+    # Screening verdicts at least this confident are final, the rest are escalated to model
+    accept_confidence: float = float(os.getenv("CASCADE_ACCEPT_CONFIDENCE", "0.9"))
+    reject_confidence: float = float(os.getenv("CASCADE_REJECT_CONFIDENCE", "0.8"))
+    screen_description_chars: int = 800
+    # JSON mode with no reasoning trace and an output cap sized to the batch. Reasoning models think
+    # even when the trace is hidden, so this mode matches with a non-reasoning model instead.
+    structured_output: bool = os.getenv("GROQ_STRUCTURED_OUTPUT", "0") == "1"
+    structured_model: str = os.getenv("GROQ_STRUCTURED_MODEL", "llama-3.3-70b-versatile")
+    output_tokens_base: int = 64
+    output_tokens_per_match: int = 160
+    output_tokens_per_verdict: int = 24
+
+
+# Models can return numbers for fields like salary or experience
+MatchField = Optional[Union[str, int, float]]
+
+
+class MatchedJob(BaseModel):
+    job_title: str
+    company: MatchField = None
+    experience: MatchField = None
+    jobNature: MatchField = None
+    location: MatchField = None
+    salary: MatchField = None
+    apply_link: MatchField = None
+    confidence: Optional[float] = Field(None, ge=0, le=1)
+
+
+class MatchResponse(BaseModel):
+    relevant_jobs: List[MatchedJob]
+
+
+class ScreenVerdict(BaseModel):
+    index: int
+    relevant: bool
+    confidence: float = Field(ge=0, le=1)
+
+
+class ScreenResponse(BaseModel):
+    verdicts: List[ScreenVerdict]
 
 
 class GroqClient:
@@ -756,49 +1382,86 @@ class GroqClient:
             raise ValueError("No API key provided for GroqClient.")
 
         try:
-            self.client = Groq(api_key=self.api_key)
+            from groq import Groq
             self.config = GroqConfig()
-            self.logger.info(f"GroqClient initialized with model: {self.config.model}")
+            self.client = Groq(api_key=self.api_key, base_url=self.config.base_url)
+            self.logger.info(
+                "GroqClient initialized with model: %s, screening model: %s",
+                self.config.model, self.config.screen_model or "none")
         except Exception as e:
-            self.logger.error(f"Failed to initialize Groq client: {e}", exc_info=True)
+            self.logger.error("Failed to initialize Groq client: %s", e, exc_info=True)
             raise
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), reraise=True)
-    def get_completion(self, prompt: str, max_tokens: Optional[int] = None) -> str:
-        """Sends a prompt to the Groq API and returns the completion."""
+    @property
+    def cascade_enabled(self) -> bool:
+        return bool(self.client and self.config and self.config.screen_model)
+
+    @property
+    def structured_output(self) -> bool:
+        return bool(self.config and self.config.structured_output)
+
+    def get_completion(self, prompt: str, max_tokens: Optional[int] = None, model: Optional[str] = None,
+                       json_mode: bool = False) -> str:
+        """Sends a prompt to the Groq API and returns the completion, retrying failed requests."""
+        try:
+            return self._retrying_completion(prompt, max_tokens, model, json_mode)
+        except CompletionTruncated:
+            # Cut off JSON never validates, so give it one more go with room to finish
+            max_tokens = (max_tokens or self.config.max_tokens) * 2
+            self.logger.warning("Completion hit the output cap, retrying with max_tokens=%s", max_tokens)
+            return self._retrying_completion(prompt, max_tokens, model, json_mode)
+
+    def _retrying_completion(self, prompt: str, max_tokens: Optional[int], model: Optional[str],
+                             json_mode: bool) -> str:
+        from tenacity import Retrying, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+        for attempt in Retrying(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10),
+                                retry=retry_if_not_exception_type(CompletionTruncated), reraise=True):
+            with attempt:
+                return self._request_completion(prompt, max_tokens, model, json_mode)
+
+    def _request_completion(self, prompt: str, max_tokens: Optional[int] = None, model: Optional[str] = None,
+                            json_mode: bool = False) -> str:
+        """Sends a single completion request to the Groq API."""
         if not self.client or not self.config:
             self.logger.error("GroqClient not properly initialized.")
             raise GroqAPIError("GroqClient not initialized.")
 
-        self.logger.debug(f"Sending prompt to Groq (first 100 chars): {prompt[:100]}...")
+        model = model or self.config.model
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.logger.debug("Sending prompt to Groq %s (first 100 chars): %s...", model, prompt[:100])
         try:
             resp = self.client.chat.completions.create(
                 messages=[{"role": "user", "content": prompt}],
-                model=self.config.model,
+                model=model,
                 temperature=self.config.temperature,
                 max_tokens=max_tokens or self.config.max_tokens,
                 top_p=self.config.top_p,
-                stream=False
+                stream=False,
+                **({"response_format": {"type": "json_object"}} if json_mode else {})
             )
 
             # --- Added Logging ---
-            self.logger.debug(f"Received response object type: {type(resp)}")
             if hasattr(resp, 'choices') and resp.choices:
                 choice = resp.choices[0]
-                self.logger.debug(f"Received choice object type: {type(choice)}")
                 if hasattr(choice, 'message') and choice.message:
                     message = choice.message
-                    self.logger.debug(f"Received message object type: {type(message)}")
                     if hasattr(message, 'content'):
                         content = message.content
-                        self.logger.debug(f"Received content type: {type(content)}")
                         if isinstance(content, str):
-                            self.logger.debug(f"Received content length: {len(content)}")
-                            self.logger.debug(f"Returning completion string (first 100 chars): {content[:100]}...")
+                            if json_mode and getattr(choice, "finish_reason", None) == "length":
+                                raise CompletionTruncated(f"Completion truncated at {max_tokens or self.config.max_tokens} tokens")
+                            if debug:
+                                self.logger.debug(
+                                    "Received %s -> %s -> %s with %s content of length %s",
+                                    type(resp).__name__, type(choice).__name__, type(message).__name__,
+                                    type(content).__name__, len(content)
+                                )
+                                self.logger.debug("Returning completion string (first 100 chars): %s...", content[:100])
                             return content.strip()
                         else:
-                            self.logger.error(f"Content is not a string. Type: {type(content)}")
-                            self.logger.debug(f"Content value: {content}")
+                            self.logger.error("Content is not a string. Type: %s", type(content))
+                            self.logger.debug("Content value: %s", content)
                             raise GroqAPIError(f"Unexpected content type from Groq API: {type(content)}")
                     else:
                         self.logger.error("Message object has no 'content' attribute.")
@@ -807,15 +1470,17 @@ class GroqClient:
                     self.logger.error("Response choice object has no 'message' attribute or message is None.")
                     raise GroqAPIError("Response choice missing message.")
             else:
-                self.logger.error(f"Unexpected Groq API response structure or no choices: {resp}")
+                self.logger.error("Unexpected Groq API response structure or no choices: %s", resp)
                 raise GroqAPIError("Unexpected response structure or no choices from Groq API.")
             # --- End Added Logging ---
 
+        except CompletionTruncated:
+            raise
         except Exception as e:
-            self.logger.error(f"Error during Groq API request: {e}", exc_info=True)
+            self.logger.error("Error during Groq API request: %s", e, exc_info=True)
             if "model_not_found" in str(e).lower():
                 self.logger.error(
-                    f"Model '{self.config.model}' might not be available or misspelled. Check available models on Groq.")
+                    "Model '%s' might not be available or misspelled. Check available models on Groq.", model)
             raise GroqAPIError(f"API request failed after retries: {e}")
 
     def search_jobs_batch(self,
@@ -840,9 +1505,13 @@ class GroqClient:
             jobs_json = json.dumps(jobs_data, ensure_ascii=False, indent=2)
             criteria_json = json.dumps(search_criteria, ensure_ascii=False, indent=2)
         except TypeError as e:
-            self.logger.error(f"Failed to serialize job data or criteria to JSON: {e}")
+            self.logger.error("Failed to serialize job data or criteria to JSON: %s", e)
             return ""
 
+        fields = "job_title, company, experience, jobNature, location, salary, apply_link"
+        if self.structured_output:
+            # The response schema requires it, so it is listed with the others
+            fields += ", confidence (between 0 and 1, how sure you are the job matches)"
         prompt = (
             "You are a job-matching assistant. Your task is to filter job listings based on specific criteria.\n"
             "Here is a list of job listings (JSON array):\n"
@@ -851,14 +1520,20 @@ class GroqClient:
             f"{criteria_json}\n\n"
             "Analyze the job listings and return a JSON object containing only the jobs that match ALL the provided criteria. If it even matches some criteria of skills approve it.\n"
             "The response MUST be a JSON object with a single key named \"relevant_jobs\". The value of this key must be an array of job objects.\n"
-            "Each job object in the array MUST include exactly these fields: job_title, company, experience, jobNature, location, salary, apply_link.\n"
+            f"Each job object in the array MUST include exactly these fields: {fields}.\n"
             "Ensure the experience level (e.g., '2 years') and location (e.g., 'Islamabad, Pakistan') are matched appropriately. Consider salary ranges if provided.\n"
             "If a job listing is missing one of the required fields (like 'salary' or 'apply_link'), attempt to infer it, represent it as 'Not Specified' or null, otherwise exclude the job if essential criteria cannot be verified.\n"
-            "VERY IMPORTANT: Show your thinking first in a think tag, then respond ONLY with the JSON object. Do NOT include any introductory text, explanations, apologies, or concluding remarks. The JSON response should start with `{` and end with `}`."
         )
+        if self.structured_output:
+            prompt += "Respond ONLY with the JSON object, without any reasoning or other text."
+            model = self.config.structured_model
+            max_tokens = self.config.output_tokens_base + self.config.output_tokens_per_match * len(jobs_data)
+        else:
+            prompt += "VERY IMPORTANT: Show your thinking first in a think tag, then respond ONLY with the JSON object. Do NOT include any introductory text, explanations, apologies, or concluding remarks. The JSON response should start with `{` and end with `}`."
+            model = max_tokens = None
 
         try:
-            result_str = self.get_completion(prompt)
+            result_str = self.get_completion(prompt, max_tokens, model, json_mode=self.structured_output)
 
             if raw_responses_collector is not None:
                 raw_responses_collector.append(result_str)
@@ -866,22 +1541,124 @@ class GroqClient:
             return result_str
 
         except GroqAPIError as e:
-            self.logger.error(f"Groq API error during job search: {e}")
+            self.logger.error("Groq API error during job search: %s", e)
             return ""
         except Exception as e:
-            self.logger.error(f"An unexpected error occurred during job search: {e}", exc_info=True)
+            self.logger.error("An unexpected error occurred during job search: %s", e, exc_info=True)
             return ""
 
+    def screen_jobs_batch(self,
+                          jobs_data: List[Dict[str, Any]],
+                          search_criteria: Dict[str, str],
+                          raw_responses_collector: Optional[List[str]] = None
+                          ) -> Optional[List[Optional[ScreenVerdict]]]:
+        """
+        Asks the screening model for a relevance verdict and confidence per job.
+        Returns the verdict for jobs it is confident about and None for jobs to escalate,
+        or None for the whole batch if screening failed.
+        """
+        if not self.cascade_enabled or not jobs_data:
+            return None
+
+        listings = [
+            {
+                "index": index,
+                "job_title": job.get("job_title"),
+                "company": job.get("company"),
+                "location": job.get("place") or job.get("location"),
+                "jobNature": job.get("jobNature"),
+                "experience": job.get("experience"),
+                "salary": job.get("salary"),
+                "description": (job.get("description") or "")[:self.config.screen_description_chars]
+            }
+            for index, job in enumerate(jobs_data)
+        ]
+        prompt = (
+            "You are screening job listings for a job seeker.\n"
+            "Here is a list of job listings (JSON array):\n"
+            f"{json.dumps(listings, ensure_ascii=False)}\n\n"
+            "Here are the search criteria (JSON object):\n"
+            f"{json.dumps(search_criteria, ensure_ascii=False)}\n\n"
+            "For each listing decide whether it matches the criteria (partly matching skills are enough) "
+            "and how confident you are, from 0 to 1.\n"
+            "Respond ONLY with a JSON object of the form "
+            "{\"verdicts\": [{\"index\": 0, \"relevant\": true, \"confidence\": 0.95}]}, with one entry per listing."
+        )
+
+        if self.structured_output:
+            max_tokens = self.config.output_tokens_base + self.config.output_tokens_per_verdict * len(jobs_data)
+        else:
+            max_tokens = self.config.screen_max_tokens
+
+        try:
+            result_str = self.get_completion(
+                prompt, max_tokens, self.config.screen_model, json_mode=self.structured_output)
+        except Exception as e:
+            self.logger.warning("Screening failed, escalating the whole batch: %s", e)
+            return None
+
+        if raw_responses_collector is not None:
+            raw_responses_collector.append(result_str)
+
+        try:
+            if self.structured_output:
+                verdicts = ScreenResponse.parse_raw(result_str).verdicts
+            else:
+                verdicts = ScreenResponse.parse_obj(extract_json_from_llm_response(result_str) or {}).verdicts
+        except ValidationError as e:
+            self.logger.warning("Screening response did not match the schema, escalating the whole batch: %s", e)
+            return None
+
+        decisions: List[Optional[ScreenVerdict]] = [None] * len(jobs_data)
+        for verdict in verdicts:
+            if not 0 <= verdict.index < len(jobs_data):
+                continue
+            threshold = self.config.accept_confidence if verdict.relevant else self.config.reject_confidence
+            if verdict.confidence >= threshold:
+                decisions[verdict.index] = verdict
+        return decisions
+
+
+GROQ_CLIENT = None
+GROQ_CLIENT_LOCK = threading.Lock()
 
-def process_job_batches(jobs: List[Dict[str, Any]], batch_size: int = 10, source_identifier: str = "data"):
-    """Takes a list of job listings and yields batches."""
-    if jobs:
-        for i in range(0, len(jobs), batch_size):
-            batch = jobs[i:i + batch_size]
-            logger.info(f"Yielding batch {i // batch_size + 1} from {source_identifier} (size: {len(batch)})")
+
+def ensure_groq_api_key():
+    """Fall back to the bundled key when GROQ_API_KEY is not set"""
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        api_key = "your_groq_api_key"  # Replace with your actual key
+        os.environ["GROQ_API_KEY"] = "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"
+
+
+def get_groq_client() -> GroqClient:
+    """Shared GroqClient, built on first use or by the startup warm-up"""
+    global GROQ_CLIENT
+    with GROQ_CLIENT_LOCK:
+        if GROQ_CLIENT is None:
+            GROQ_CLIENT = GroqClient()
+        return GROQ_CLIENT
+
+
+def process_job_batches(jobs: Iterable[Dict[str, Any]], batch_size: int = 10, source_identifier: str = "data"):
+    """Takes job listings, as a list or a stream, and yields each batch as soon as it fills up."""
+    batch = []
+    batch_count = 0
+    for job in jobs:
+        batch.append(job)
+        if len(batch) == batch_size:
+            batch_count += 1
+            log_job(logger, "Yielding batch %s from %s (size: %s)", batch_count, source_identifier, len(batch))
             yield batch
-    else:
-        logger.warning(f"No jobs found from {source_identifier} to process.")
+            batch = []
+
+    if batch:
+        batch_count += 1
+        log_job(logger, "Yielding batch %s from %s (size: %s)", batch_count, source_identifier, len(batch))
+        yield batch
+
+    if not batch_count:
+        logger.warning("No jobs found from %s to process.", source_identifier)
         yield []
 
 
@@ -939,10 +1716,1205 @@ def extract_json_from_llm_response(response_text: str) -> Optional[Dict]:
             return None
 
     except Exception as e:
-        logger.error(f"Error extracting JSON from response: {e}")
+        logger.error("Error extracting JSON from response: %s", e)
         return None
 
 
+# ==================== CIRCUIT BREAKERS ====================
+
+# Consecutive failures that open a source's circuit, and how long it then stays skipped
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("BREAKER_COOLDOWN_SECONDS", "300"))
+
+
+class CircuitBreaker:
+    """
+    Skips a dependency after failure_threshold consecutive failures, for cooldown seconds.
+    After the cool-down a single trial call goes through, its outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURES,
+                 cooldown: float = BREAKER_COOLDOWN_SECONDS):
+        self.logger = logging.getLogger("CircuitBreaker")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return "open"
+            return "half-open"
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self.trial_running:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                self.logger.info("Circuit for %s closed again", self.name)
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def release(self):
+        """End a trial call that finished without an outcome, e.g. cancelled, so another one may run"""
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                self.logger.warning(
+                    "Circuit for %s open after %s failures, skipping it for %ss",
+                    self.name, self.failures, self.cooldown)
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+
+SOURCE_BREAKERS: Dict[str, CircuitBreaker] = {}
+SOURCE_BREAKERS_LOCK = threading.Lock()
+
+
+def source_breaker(name: str) -> CircuitBreaker:
+    with SOURCE_BREAKERS_LOCK:
+        if name not in SOURCE_BREAKERS:
+            SOURCE_BREAKERS[name] = CircuitBreaker(name)
+        return SOURCE_BREAKERS[name]
+
+
+# ==================== LOCATION GAZETTEER ====================
+
+# Jobs in cities farther than this from the searched city are dropped before matching
+LOCATION_RADIUS_KM = float(os.getenv("LOCATION_RADIUS_KM", "50"))
+
+GAZETTEER: Optional[Gazetteer] = None
+GAZETTEER_CHECKED = False
+GAZETTEER_LOCK = threading.Lock()
+
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """Shared Gazetteer, opened on first use, None when no index has been built"""
+    global GAZETTEER, GAZETTEER_CHECKED
+    with GAZETTEER_LOCK:
+        if not GAZETTEER_CHECKED:
+            GAZETTEER_CHECKED = True
+            if not os.path.exists(GAZETTEER_PATH):
+                logger.warning("No gazetteer index at %s, location matching is left to the LLM", GAZETTEER_PATH)
+            else:
+                try:
+                    GAZETTEER = Gazetteer(GAZETTEER_PATH)
+                except Exception as e:
+                    logger.error("Could not load gazetteer %s: %s", GAZETTEER_PATH, e)
+        return GAZETTEER
+
+
+@lru_cache(maxsize=4096)
+def resolve_location(text: str) -> Optional[Place]:
+    """
+    Canonical place for a location string, cached because scraped locations repeat a lot.
+    Names that could mean unrelated places resolve to None, so they are left as typed and to the LLM.
+    """
+    gazetteer = get_gazetteer()
+    return gazetteer.resolve(text, unambiguous=True) if gazetteer and text else None
+
+
+# ==================== STREAMING PIPELINE ====================
+
+# (name, scraper factory, iter_jobs keyword arguments) for every source a search scrapes
+JOB_SOURCES = [
+    ("LinkedIn", LinkedInJobScraper, {"max_results": 25}),
+    ("Indeed", IndeedScraper, {}),
+    ("Glassdoor", GlassdoorScraper, {}),
+]
+
+# Scraped jobs buffered between the scrapers and batching, and LLM batches in flight at once
+MAX_BUFFERED_JOBS = 50
+LLM_MAX_IN_FLIGHT = 3
+
+# Time budget for one search, and the share of it the scrapers get before matching has to wrap up
+SEARCH_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", "120"))
+SCRAPE_DEADLINE_SHARE = float(os.getenv("SCRAPE_DEADLINE_SHARE", "0.7"))
+
+
+def time_left(deadline: Optional[float]) -> Optional[float]:
+    """Seconds until a time.monotonic() deadline, None when there is no deadline"""
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def stream_scraped_jobs(criteria: Dict, sources: Optional[List[tuple]] = None,
+                        max_buffered: int = MAX_BUFFERED_JOBS,
+                        watermarks: Optional[Dict[str, Any]] = None,
+                        deadline: Optional[float] = None,
+                        statuses: Optional[Dict[str, Dict]] = None) -> Iterator[Dict]:
+    """
+    Run every scraper in its own thread and yield jobs as soon as any of them produces one.
+    The bounded queue applies backpressure, so scrapers pause instead of piling up records.
+    Watermarks, keyed by source name, let scrapers skip postings an earlier crawl already saw.
+    Scrapers get the deadline to stop paging and backing off past it, sources still running at the
+    deadline are abandoned, and each source's outcome goes to statuses.
+    """
+    sources = sources if sources is not None else JOB_SOURCES
+    statuses = statuses if statuses is not None else {}
+    job_queue = queue.Queue(maxsize=max_buffered)
+    stop = threading.Event()
+    # Sources currently waiting for room in the queue, held up by the consumer rather than their site
+    blocked = set()
+
+    def put(name: str, item) -> bool:
+        try:
+            while not stop.is_set():
+                try:
+                    job_queue.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    blocked.add(name)
+            return False
+        finally:
+            blocked.discard(name)
+
+    def produce(name: str, factory: Callable[[], Any], kwargs: Dict):
+        count = 0
+        status = "ok"
+        started = time.monotonic()
+        scraper = None
+        try:
+            scraper = factory()
+            if watermarks and watermarks.get(name):
+                kwargs = dict(kwargs, watermark=watermarks[name])
+            if deadline is not None:
+                kwargs = dict(kwargs, deadline=deadline)
+            jobs = scraper.iter_jobs(criteria, **kwargs)
+            try:
+                for job in jobs:
+                    if not put(name, job):
+                        break
+                    count += 1
+            finally:
+                jobs.close()
+        except Exception as e:
+            status = "error"
+            logger.error("An error occurred while scraping %s: %s", name, e, exc_info=True)
+        finally:
+            if scraper:
+                scraper.close()
+            logger.info("%s scraper returned %s jobs.", name, count)
+            # Jobs are dicts, a tuple marks the end of one source
+            put(name, (name, status, count, time.monotonic() - started))
+
+    threads = []
+    for source in sources:
+        name = source[0]
+        if not source_breaker(name).allow():
+            logger.warning("Skipping %s, its circuit is open", name)
+            statuses[name] = {"status": "skipped", "jobs": 0, "seconds": 0.0}
+            continue
+        threads.append(threading.Thread(target=produce, args=source, name=f"scrape-{name}", daemon=True))
+    for thread in threads:
+        thread.start()
+
+    running = {thread.name[len("scrape-"):]: 0 for thread in threads}
+    started = time.monotonic()
+    try:
+        while running:
+            timeout = time_left(deadline)
+            if timeout == 0:
+                for name, count in running.items():
+                    if name in blocked:
+                        # Slow matching filled the queue, the site itself was fine
+                        logger.warning("%s scraper was still waiting on matching at the deadline", name)
+                        source_breaker(name).release()
+                    else:
+                        logger.warning("%s scraper missed the deadline after %s jobs", name, count)
+                        source_breaker(name).record_failure()
+                    statuses[name] = {"status": "timeout", "jobs": count, "seconds": round(time.monotonic() - started, 2)}
+                running.clear()
+                break
+            try:
+                item = job_queue.get(timeout=timeout)
+            except queue.Empty:
+                continue
+
+            if isinstance(item, tuple):
+                name, status, count, seconds = item
+                running.pop(name, None)
+                if status == "ok":
+                    source_breaker(name).record_success()
+                else:
+                    source_breaker(name).record_failure()
+                statuses[name] = {"status": status, "jobs": count, "seconds": round(seconds, 2)}
+            else:
+                source = item.get("source")
+                if source in running:
+                    running[source] += 1
+                yield item
+    finally:
+        # Tell scrapers to wind down if the consumer stopped before they finished
+        stop.set()
+        for name, count in running.items():
+            source_breaker(name).release()
+            statuses[name] = {"status": "cancelled", "jobs": count, "seconds": round(time.monotonic() - started, 2)}
+
+
+# Criteria fields that change what the scrapers fetch, the rest only matter for matching
+SCRAPE_KEY_FIELDS = ("position", "location", "jobNature")
+
+
+def scrape_key(criteria: Dict) -> tuple:
+    """Searches with the same scrape key can share one scrape, locations naming the same place count as equal"""
+    key = {field: " ".join(str(criteria.get(field, "")).lower().split()) for field in SCRAPE_KEY_FIELDS}
+    place = resolve_location(criteria.get("location") or "")
+    if place:
+        key["location"] = f"place:{place.geoname_id}"
+    return tuple(key.values())
+
+
+def shared_scrape_criteria(group: List[Dict]) -> Dict:
+    """Criteria used to scrape once for a group, dropping the experience filter if the group disagrees on it"""
+    scrape_criteria = dict(group[0])
+    if any(criteria.get("experience") != scrape_criteria.get("experience") for criteria in group[1:]):
+        scrape_criteria["experience"] = ""
+    # Scrapers search for the canonical place instead of whatever spelling the user typed
+    place = resolve_location(scrape_criteria.get("location") or "")
+    if place:
+        scrape_criteria["location"] = get_gazetteer().display_name(place)
+    return scrape_criteria
+
+
+def filter_by_location(jobs: Iterable[Dict], criteria: Dict, rejected: List[Dict]) -> Iterator[Dict]:
+    """
+    Tag jobs with their canonical place and drop those outside the searched area before they reach the LLM.
+    Jobs whose location can not be resolved, and all jobs of remote searches, are passed on.
+    """
+    gazetteer = get_gazetteer()
+    area = resolve_location(criteria.get("location") or "")
+    remote = "remote" in str(criteria.get("jobNature") or "").lower()
+    for job in jobs:
+        place = resolve_location(job.get("location") or "") if gazetteer else None
+        if place:
+            job["place_id"] = place.geoname_id
+            job["place"] = gazetteer.display_name(place)
+            if area and not remote and not gazetteer.within(area, place, LOCATION_RADIUS_KM):
+                rejected.append(job)
+                continue
+        yield job
+    if rejected:
+        logger.info("Dropped %s jobs outside %s", len(rejected), gazetteer.display_name(area))
+
+
+def posting_key(job: Dict) -> Optional[str]:
+    """Identity of the posting on its source, None for matches not yet tied to a scraped job"""
+    source, job_id = posting_mark(job)
+    return f"{source}:{job_id}" if source and job_id else None
+
+
+def listing_key(job: Dict) -> Optional[str]:
+    """Title, company and city, which tell the same job apart when it is listed on several sources"""
+    title = " ".join(str(job.get("job_title") or "").lower().split())
+    company = " ".join(str(job.get("company") or "").lower().split())
+    # Sources spell locations differently past the city, "Lahore" vs "Lahore, Punjab, Pakistan"
+    city = " ".join(str(job.get("location") or "").split(",")[0].lower().split())
+    return f"{title}|{company}|{city}" if title and company else None
+
+
+def job_keys(job: Dict) -> List[str]:
+    """Identities of a job, by posting and by title, company and city, used to spot repeats across sources"""
+    return [key for key in (posting_key(job), listing_key(job)) if key]
+
+
+def is_repeat(job: Dict, seen: Dict[str, str]) -> bool:
+    """
+    Whether job repeats one in seen, which maps keys to the source they came from: the same posting,
+    or the same title, company and city on another source. A source's own postings with different IDs
+    are different openings. New jobs are added to seen.
+    """
+    source = job.get("source", "")
+    posting, listing = posting_key(job), listing_key(job)
+    if posting in seen or (listing in seen and seen[listing] != source):
+        return True
+    for key in (posting, listing):
+        if key:
+            seen.setdefault(key, source)
+    return False
+
+
+def dedupe_jobs(jobs: Iterable[Dict]) -> Iterator[Dict]:
+    """Drop jobs already seen earlier in the stream"""
+    seen = {}
+    kept = 0
+    dropped = 0
+    for job in jobs:
+        if is_repeat(job, seen):
+            dropped += 1
+            continue
+        kept += 1
+        yield job
+    logger.info("Total scraped jobs combined: %s (%s duplicates dropped)", kept, dropped)
+
+
+def parse_structured_matches(raw_response_str: str, batch_count: int) -> Optional[List[Dict]]:
+    """Validate a JSON mode response against the match schema, None if it does not fit"""
+    try:
+        matches = [job.dict() for job in MatchResponse.parse_raw(raw_response_str).relevant_jobs]
+    except ValidationError as e:
+        logger.warning("Response from batch %s did not match the schema: %s", batch_count, e)
+        return None
+    log_job(logger, "Parsed %s relevant matches from batch %s.", len(matches), batch_count)
+    return matches
+
+
+def parse_batch_matches(raw_response_str: str, batch_count: int) -> List[Dict]:
+    """Pull the relevant_jobs list out of one batch's raw LLM response"""
+    if not raw_response_str:
+        logger.warning("Empty response string from batch %s", batch_count)
+        return []
+
+    try:
+        json_data = extract_json_from_llm_response(raw_response_str)
+
+        if json_data and "relevant_jobs" in json_data:
+            matches = json_data["relevant_jobs"]
+            if isinstance(matches, list):
+                log_job(logger, "Parsed %s relevant matches from batch %s.", len(matches), batch_count)
+                return matches
+            logger.warning("'relevant_jobs' is not a list in response from batch %s", batch_count)
+        else:
+            logger.warning("Could not extract valid JSON from batch %s", batch_count)
+    except Exception as e:
+        logger.error("Error processing response from batch %s: %s", batch_count, e, exc_info=True)
+    return []
+
+
+# Fields of a match object, as the matching prompt asks the model to return them
+MATCH_FIELDS = ("job_title", "company", "experience", "jobNature", "location", "salary", "apply_link")
+
+# Matches at least this confident count towards a search's limit. The full model's matches count
+# as this confident when it gives no confidence of its own.
+TOP_K_MIN_CONFIDENCE = float(os.getenv("TOP_K_MIN_CONFIDENCE", "0.8"))
+# Jobs held back to be reordered by local relevance before batching, for searches with a limit
+RANK_WINDOW = int(os.getenv("RANK_WINDOW", "30"))
+
+WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def local_relevance(job: Dict, criteria: Dict) -> float:
+    """Cheap 0-1 relevance from keyword overlap, used to order work and to break ties between matches"""
+    title_words = set(WORD_RE.findall(str(job.get("job_title") or "").lower()))
+    text = f"{job.get('job_title') or ''} {job.get('description') or ''}".lower()
+
+    wanted = set(WORD_RE.findall(str(criteria.get("position") or "").lower()))
+    title_score = len(wanted & title_words) / len(wanted) if wanted else 0.0
+
+    skills = [skill.strip().lower() for skill in str(criteria.get("skills") or "").split(",") if skill.strip()]
+    skill_score = sum(1 for skill in skills if skill in text) / len(skills) if skills else 0.0
+
+    nature = str(criteria.get("jobNature") or "").lower()
+    nature_score = 1.0 if nature and nature in str(job.get("jobNature") or "").lower() else 0.0
+
+    place = str(criteria.get("location") or "").split(",")[0].strip().lower()
+    location_score = 1.0 if place and place in str(job.get("location") or "").lower() else 0.0
+
+    return round(0.45 * title_score + 0.35 * skill_score + 0.1 * nature_score + 0.1 * location_score, 3)
+
+
+def prioritize_jobs(jobs: Iterable[Dict], criteria: Dict, window: int = RANK_WINDOW) -> Iterator[Dict]:
+    """Reorder a job stream so the most locally relevant of the next window jobs come first"""
+    heap = []
+    for order, job in enumerate(jobs):
+        heapq.heappush(heap, (-local_relevance(job, criteria), order, job))
+        if len(heap) >= window:
+            yield heapq.heappop(heap)[2]
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+def score_match(match: Dict, job: Optional[Dict], criteria: Dict, confidence: Optional[float]) -> Dict:
+    """Attach confidence, local relevance and the combined score used for ranking"""
+    confidence = TOP_K_MIN_CONFIDENCE if confidence is None else confidence
+    relevance = local_relevance(job or match, criteria)
+    if job is not None:
+        # Ties the match to its posting for the watermarks and for merging with earlier matches
+        match["source"] = job.get("source", "")
+    match["confidence"] = round(confidence, 3)
+    match["relevance"] = relevance
+    match["score"] = round(0.7 * confidence + 0.3 * relevance, 3)
+    return match
+
+
+def rank_matches(matches: List[Dict]) -> List[Dict]:
+    return sorted(matches, key=lambda match: match.get("score", 0), reverse=True)
+
+
+def match_batch(client: GroqClient, batch: List[Dict], criteria: Dict, raw_llm_responses: List[str],
+                batch_count: int) -> Optional[tuple]:
+    """
+    Match one batch through the model cascade. The screening model settles the jobs it is confident
+    about and only the rest go to the full model. Returns (scored matches, jobs settled by screening,
+    jobs escalated), or None when the batch could not be evaluated.
+    """
+    matches = []
+    escalate = batch
+    if client.cascade_enabled:
+        decisions = client.screen_jobs_batch(batch, criteria, raw_llm_responses)
+        if decisions is not None:
+            escalate = [job for job, decision in zip(batch, decisions) if decision is None]
+            matches = [
+                score_match({field: job.get(field) or "Not Specified" for field in MATCH_FIELDS},
+                            job, criteria, decision.confidence)
+                for job, decision in zip(batch, decisions) if decision and decision.relevant
+            ]
+
+    if escalate:
+        # search_jobs_batch logs API errors and answers with an empty string
+        raw_response_str = client.search_jobs_batch(escalate, criteria, raw_llm_responses)
+        if not raw_response_str:
+            return None
+        if client.structured_output:
+            escalated_matches = parse_structured_matches(raw_response_str, batch_count)
+            if escalated_matches is None:
+                return None
+        else:
+            escalated_matches = parse_batch_matches(raw_response_str, batch_count)
+
+        # Matches only echo a few fields, find the scraped job behind each by its link, else by its listing
+        jobs_by_id = {posting_id(job): job for job in escalate}
+        jobs_by_listing = {listing_key(job): job for job in reversed(escalate)}
+        for match in escalated_matches:
+            job = jobs_by_id.get(posting_id(match)) or jobs_by_listing.get(listing_key(match))
+            matches.append(score_match(match, job, criteria, match.pop("confidence", None)))
+    return matches, len(batch) - len(escalate), len(escalate)
+
+
+def match_job_stream(client: GroqClient, jobs: Iterable[Dict], criteria: Dict, batch_size: int,
+                     raw_llm_responses: List[str], evaluated_jobs: Optional[List[Dict]] = None,
+                     deadline: Optional[float] = None, stats: Optional[Dict[str, int]] = None,
+                     limit: Optional[int] = None) -> List[Dict]:
+    """
+    Send batches to the LLM as they fill up, keeping at most LLM_MAX_IN_FLIGHT calls running.
+    Batches still unanswered at the deadline are abandoned. With a limit, the most locally relevant
+    jobs go first and no more batches are sent once limit confident matches are in.
+    Jobs the LLM actually evaluated are added to evaluated_jobs. Batch counts go to stats.
+    """
+    evaluated_jobs = evaluated_jobs if evaluated_jobs is not None else []
+    stats = stats if stats is not None else {}
+    stats.update(batches=0, completed=0, failed=0, timed_out=0, resolved_by_screen=0, escalated=0,
+                 stopped_early=False)
+    all_matches = []
+    in_flight = {}
+
+    def enough() -> bool:
+        return limit is not None and sum(
+            1 for match in all_matches if match["confidence"] >= TOP_K_MIN_CONFIDENCE) >= limit
+
+    def collect(future):
+        count, batch = in_flight.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error("Error during Groq API call for batch %s: %s", count, e, exc_info=True)
+            result = None
+        if result is None:
+            stats["failed"] += 1
+            return
+        matches, resolved, escalated = result
+        evaluated_jobs.extend(batch)
+        stats["completed"] += 1
+        stats["resolved_by_screen"] += resolved
+        stats["escalated"] += escalated
+        all_matches.extend(matches)
+
+    if limit is not None:
+        jobs = prioritize_jobs(jobs, criteria)
+
+    executor = ThreadPoolExecutor(max_workers=LLM_MAX_IN_FLIGHT)
+    try:
+        for batch in process_job_batches(jobs, batch_size, source_identifier="scraped_data"):
+            if not batch:
+                continue
+            if enough():
+                logger.info("Found %s confident matches, no more batches needed", limit)
+                stats["stopped_early"] = True
+                break
+            if time_left(deadline) == 0:
+                stats["timed_out"] += 1
+                break
+            stats["batches"] += 1
+            future = executor.submit(match_batch, client, batch, criteria, raw_llm_responses, stats["batches"])
+            in_flight[future] = (stats["batches"], batch)
+
+            if len(in_flight) >= LLM_MAX_IN_FLIGHT:
+                done, _ = wait(in_flight, timeout=time_left(deadline), return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+                if not done or enough():
+                    stats["stopped_early"] = bool(done)
+                    break
+
+        done, _ = wait(list(in_flight), timeout=time_left(deadline))
+        for future in done:
+            collect(future)
+
+        for future, (count, batch) in list(in_flight.items()):
+            logger.warning("LLM batch %s missed the deadline, returning without it", count)
+            future.cancel()
+            stats["timed_out"] += 1
+    finally:
+        # Don't wait for abandoned calls, they finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    evaluated = stats["resolved_by_screen"] + stats["escalated"]
+    stats["screen_resolved_fraction"] = round(stats["resolved_by_screen"] / evaluated, 3) if evaluated else 0.0
+    if evaluated and client.cascade_enabled:
+        logger.info("Screening model settled %s of %s jobs, %s escalated",
+                    stats["resolved_by_screen"], evaluated, stats["escalated"])
+    return all_matches
+
+
+# ==================== REQUEST COALESCING ====================
+
+class SingleFlightError(Exception):
+    """Raised to callers that attached to an in-flight computation which failed."""
+    pass
+
+
+def canonical_criteria_key(criteria: Dict[str, Any]) -> str:
+    """Stable key for search criteria, ignoring case and whitespace differences"""
+    normalized = {key: " ".join(str(value).lower().split()) for key, value in criteria.items()}
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key so only one of them does the work.
+    Callers in the same process await the leader's future. Other uvicorn workers
+    find the leader through a small SQLite table and poll it for the result.
+    """
+
+    def __init__(self, db_path: str = "singleflight.db", stale_after: float = SEARCH_DEADLINE_SECONDS + 30.0,
+                 linger: float = 5.0, poll_interval: float = 0.5, wait_timeout: Optional[float] = None):
+        self.logger = logging.getLogger("SingleFlight")
+        self.db_path = db_path
+        # A search answers by its deadline, so a running flight older than stale_after belongs to a dead worker
+        self.stale_after = stale_after
+        # Longest a follower waits on other workers in total, including leaders that died and were replaced
+        self.wait_timeout = stale_after if wait_timeout is None else wait_timeout
+        # Finished results stay visible this long for callers that arrive just after completion
+        self.linger = linger
+        self.poll_interval = poll_interval
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.in_flight: Dict[str, asyncio.Future] = {}
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS flights ("
+                "key TEXT PRIMARY KEY, owner TEXT, status TEXT, result TEXT, "
+                "started_at REAL, finished_at REAL)"
+            )
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.db_path, timeout=30, isolation_level=None))
+
+    def _claim(self, key: str) -> tuple:
+        """Become the leader for key unless another worker already is. Returns (role, row)"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Finished flights are only needed for the linger window
+                conn.execute(
+                    "DELETE FROM flights WHERE status != 'running' AND finished_at < ?", (now - self.linger,))
+                row = conn.execute(
+                    "SELECT owner, status, result, started_at, finished_at FROM flights WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row:
+                    owner, status, result, started_at, finished_at = row
+                    if status == "running" and now - started_at < self.stale_after:
+                        conn.execute("COMMIT")
+                        return "follower", None
+                    if status == "done" and now - finished_at < self.linger:
+                        conn.execute("COMMIT")
+                        return "done", json.loads(result)
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO flights (key, owner, status, result, started_at, finished_at) "
+                    "VALUES (?, ?, 'running', NULL, ?, NULL)",
+                    (key, self.owner, now)
+                )
+                conn.execute("COMMIT")
+                return "leader", None
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _finish(self, key: str, status: str, result: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE flights SET status = ?, result = ?, finished_at = ? WHERE key = ? AND owner = ?",
+                (status, result, time.time(), key, self.owner)
+            )
+
+    def _peek(self, key: str) -> Optional[tuple]:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT status, result, started_at FROM flights WHERE key = ?", (key,)
+            ).fetchone()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn for key, or wait for the result of a call already running elsewhere"""
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.logger.info("Attaching to in-flight search %s in this worker", key[:12])
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            result = await self._run_shared(key, fn)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved, the leader re-raises it below
+            future.exception()
+            raise
+        finally:
+            del self.in_flight[key]
+
+    async def _run_shared(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        give_up_at = time.monotonic() + self.wait_timeout
+        while True:
+            role, result = await asyncio.to_thread(self._claim, key)
+
+            if role == "done":
+                self.logger.info("Reusing just-finished result for search %s", key[:12])
+                return result
+
+            if role == "leader":
+                try:
+                    result = await fn()
+                except Exception as e:
+                    await asyncio.to_thread(self._finish, key, "failed", str(e))
+                    raise
+                except BaseException as e:
+                    # A cancelled leader would otherwise leave waiters on a "running" row until it
+                    # goes stale. Written inline, as an await here could be cancelled as well.
+                    self._finish(key, "failed", f"Leader stopped with {type(e).__name__}")
+                    raise
+                await asyncio.to_thread(self._finish, key, "done", json.dumps(result, ensure_ascii=False))
+                return result
+
+            self.logger.info("Waiting for search %s running in another worker", key[:12])
+            while True:
+                await asyncio.sleep(self.poll_interval)
+                row = await asyncio.to_thread(self._peek, key)
+                if row is None:
+                    break
+                status, result, started_at = row
+                if status == "done":
+                    return json.loads(result)
+                if status == "failed":
+                    raise SingleFlightError(f"Shared search failed: {result}")
+                if time.time() - started_at >= self.stale_after:
+                    # The leader is gone, go back and try to take over
+                    break
+                if time.monotonic() >= give_up_at:
+                    raise SingleFlightError(f"Gave up waiting for shared search after {self.wait_timeout:g}s")
+
+
+# ==================== RESULT STORAGE ====================
+
+class ResultStore:
+    """
+    Append-only JSONL log of search results and raw LLM responses.
+    Records are queued and written by a background thread so requests never wait on
+    file I/O. Each worker process appends to its own segment, segments rotate by size
+    and closed segments are gzip-compressed when compress is set. Reads go through an
+    in-memory index of record offsets that only scans bytes it has not seen yet.
+    """
+
+    def __init__(self, directory: str = "results", max_segment_bytes: int = 50 * 1024 * 1024,
+                 compress: bool = True):
+        self.logger = logging.getLogger("ResultStore")
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.compress = compress
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.writer = None
+        self.segment_path = None
+        self.segment_file = None
+        self.segment_seq = 0
+        # Segment path -> (bytes indexed, index entries), so lookups read only the records they return
+        self.index: Dict[str, tuple] = {}
+        self.index_lock = threading.Lock()
+
+    def _start_writer(self):
+        with self.lock:
+            if self.writer is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self.writer = threading.Thread(target=self._writer_loop, name="ResultStoreWriter", daemon=True)
+                self.writer.start()
+                atexit.register(self.close)
+
+    def append(self, search_id: str, kind: str, payload: Any, criteria: Optional[Dict] = None):
+        """Queue a record for writing, returns immediately"""
+        if self.writer is None:
+            self._start_writer()
+        record = {
+            "search_id": search_id,
+            "kind": kind,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "payload": payload
+        }
+        if criteria is not None:
+            record["criteria"] = criteria
+            record["criteria_key"] = canonical_criteria_key(criteria)
+        self.queue.put(record)
+
+    def save_search(self, search_id: str, criteria: Dict, matches: List[Dict], raw_responses: List[str]):
+        """Queue the matches and raw LLM responses of one search"""
+        self.append(search_id, "matches", matches, criteria)
+        if raw_responses:
+            self.append(search_id, "raw_llm_responses", raw_responses)
+
+    def _open_segment(self):
+        self.segment_seq += 1
+        name = f"results-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.segment_seq:04d}.jsonl"
+        self.segment_path = os.path.join(self.directory, name)
+        self.segment_file = open(self.segment_path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        """Close the active segment and compress it"""
+        if not self.segment_file:
+            return
+        self.segment_file.close()
+        self.segment_file = None
+        path = self.segment_path
+        if self.compress and os.path.getsize(path) > 0:
+            try:
+                with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(path)
+            except OSError as e:
+                self.logger.error("Failed to compress result segment %s: %s", path, e)
+
+    def _writer_loop(self):
+        while True:
+            record = self.queue.get()
+            # Drain whatever else is waiting so a burst becomes one write and one flush
+            batch = [record]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            lines = [json.dumps(r, ensure_ascii=False) + "\n" for r in batch if r is not None]
+            try:
+                if lines:
+                    if self.segment_file is None:
+                        self._open_segment()
+                    self.segment_file.writelines(lines)
+                    self.segment_file.flush()
+                    if self.segment_file.tell() >= self.max_segment_bytes:
+                        self._rotate()
+                if stop:
+                    self._rotate()
+            except Exception as e:
+                self.logger.error("Failed to write %s result records: %s", len(lines), e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if stop:
+                return
+
+    def close(self):
+        """Write out pending records and close the active segment"""
+        if self.writer is not None and self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+
+    def _index_segment(self, path: str) -> List[tuple]:
+        """
+        (created_at, search_id, kind, summary, offset) of each record in a segment. Closed segments
+        are read once, segments still being appended to are read on from where the last call stopped.
+        """
+        with self.index_lock:
+            scanned, entries = self.index.get(path, (0, []))
+        if path.endswith(".gz") and path in self.index:
+            return entries
+        if not path.endswith(".gz") and os.path.getsize(path) == scanned:
+            return entries
+
+        entries = list(entries)
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as f:
+            f.seek(scanned)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A record another worker is still writing, picked up by a later call
+                    break
+                offset = scanned
+                scanned += len(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                summary = None
+                if record["kind"] == "matches":
+                    summary = {
+                        "search_id": record["search_id"],
+                        "created_at": record["created_at"],
+                        "criteria": record.get("criteria"),
+                        "match_count": len(record["payload"])
+                    }
+                entries.append((record["created_at"], record["search_id"], record["kind"],
+                                record.get("criteria_key"), summary, offset))
+        with self.index_lock:
+            self.index[path] = (scanned, entries)
+        return entries
+
+    def _entries(self) -> List[tuple]:
+        """Index entries of every segment with their path, newest record first"""
+        if not os.path.isdir(self.directory):
+            return []
+        paths = [os.path.join(self.directory, n) for n in os.listdir(self.directory)
+                 if n.endswith(".jsonl") or n.endswith(".jsonl.gz")]
+        with self.index_lock:
+            # Segments compressed since the last call are indexed again under their new name
+            for path in set(self.index) - set(paths):
+                del self.index[path]
+        entries = []
+        for path in paths:
+            try:
+                entries.extend(entry + (path,) for entry in self._index_segment(path))
+            except OSError as e:
+                self.logger.error("Failed to index result segment %s: %s", path, e)
+        # Several workers write segments at once, so only the records' own times give the order
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        return entries
+
+    def _read(self, path: str, offset: int) -> Dict:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def get(self, search_id: str) -> Optional[Dict]:
+        """Look up a past search by ID"""
+        result = None
+        for created_at, record_search_id, kind, _, _, offset, path in self._entries():
+            if record_search_id != search_id or kind not in ("matches", "raw_llm_responses"):
+                continue
+            try:
+                record = self._read(path, offset)
+            except (OSError, json.JSONDecodeError) as e:
+                self.logger.error("Failed to read result record from %s: %s", path, e)
+                continue
+            if result is None:
+                result = {"search_id": search_id, "relevant_jobs": [], "raw_llm_responses": []}
+            if kind == "matches" and "created_at" not in result:
+                result["created_at"] = created_at
+                result["criteria"] = record.get("criteria")
+                result["relevant_jobs"] = record["payload"]
+            elif kind == "raw_llm_responses" and not result["raw_llm_responses"]:
+                result["raw_llm_responses"] = record["payload"]
+            if "created_at" in result and result["raw_llm_responses"]:
+                break
+        return result
+
+    def list_searches(self, limit: int = 20, criteria_key: Optional[str] = None) -> List[Dict]:
+        """Summaries of the most recent searches, optionally for one criteria key"""
+        searches = []
+        for _, _, kind, record_key, summary, _, _ in self._entries():
+            if kind != "matches":
+                continue
+            if criteria_key and record_key != criteria_key:
+                continue
+            searches.append(summary)
+            if len(searches) >= limit:
+                break
+        return searches
+
+
+RESULT_STORE = ResultStore()
+# Most searches one /results call lists
+MAX_RESULTS_LIMIT = 100
+
+
+# ==================== CRAWL WATERMARKS ====================
+
+# Repeat searches only scrape and match postings the previous run for the same criteria did not see
+INCREMENTAL_CRAWL = os.getenv("INCREMENTAL_CRAWL", "1") != "0"
+# Known postings are forgotten after this many days and evaluated again
+WATERMARK_TTL_DAYS = float(os.getenv("WATERMARK_TTL_DAYS", "14"))
+
+
+def posting_id(job: Dict) -> str:
+    """Stable ID of a posting on its source: LinkedIn job ID, Indeed jk, Glassdoor jl, or else the bare link"""
+    if job.get("job_id"):
+        return str(job["job_id"])
+    link = job.get("apply_link") or job.get("link") or ""
+    params = parse_qs(urlparse(link).query)
+    for param in ("jk", "jl", "jobListingId"):
+        if params.get(param):
+            return params[param][0]
+    return link.split("?")[0].rstrip("/")
+
+
+def posting_mark(job: Dict) -> tuple:
+    """(source, posting ID) recorded for a job once it has been matched"""
+    return job.get("source", ""), posting_id(job)
+
+
+class CrawlWatermark:
+    """
+    What earlier crawls saw on one source, for every search sharing a scrape.
+    A posting counts as known only when all of those searches have seen its ID. Posted dates are
+    not used, a capped or relevance ordered crawl leaves older postings it never fetched.
+    """
+
+    def __init__(self, known_ids: List[set]):
+        # One set of known posting IDs per search
+        self.known_ids = known_ids
+
+    @property
+    def has_history(self) -> bool:
+        return bool(self.known_ids) and all(self.known_ids)
+
+    def is_known(self, job: Dict) -> bool:
+        if not self.has_history:
+            return False
+        job_id = posting_id(job)
+        return all(job_id in ids for ids in self.known_ids)
+
+
+class WatermarkStore:
+    """
+    Postings already matched for each criteria key, in SQLite so every worker shares them.
+    A posting the LLM kept carries its match, so matches expire with their postings and loading
+    a search's history is a single indexed query.
+    """
+
+    def __init__(self, db_path: str = "watermarks.db", ttl_days: float = WATERMARK_TTL_DAYS):
+        self.logger = logging.getLogger("WatermarkStore")
+        self.db_path = db_path
+        self.ttl = ttl_days * 86400
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS crawls ("
+                "criteria_key TEXT PRIMARY KEY, search_id TEXT, crawled_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen_postings ("
+                "criteria_key TEXT, source TEXT, posting_id TEXT, match TEXT, seen_at REAL, "
+                "PRIMARY KEY (criteria_key, source, posting_id))"
+            )
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.db_path, timeout=30, isolation_level=None))
+
+    def load(self, criteria_key: str) -> Optional[tuple]:
+        """
+        Postings seen for a criteria key as ({source: posting IDs}, [(source, posting ID, match)]),
+        or None if it was never crawled.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT search_id FROM crawls WHERE criteria_key = ?", (criteria_key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "DELETE FROM seen_postings WHERE criteria_key = ? AND seen_at < ?",
+                (criteria_key, time.time() - self.ttl)
+            )
+            rows = conn.execute(
+                "SELECT source, posting_id, match FROM seen_postings WHERE criteria_key = ?", (criteria_key,)
+            ).fetchall()
+
+        marks: Dict[str, set] = {}
+        matches = []
+        for source, job_id, match in rows:
+            marks.setdefault(source, set()).add(job_id)
+            if match:
+                matches.append((source, job_id, json.loads(match)))
+        return marks, matches
+
+    def record(self, criteria_key: str, search_id: str, postings: Iterable[tuple]):
+        """Remember evaluated postings as (source, posting ID, match or None) and the search that saw them"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO seen_postings "
+                    "(criteria_key, source, posting_id, match, seen_at) VALUES (?, ?, ?, ?, ?)",
+                    [(criteria_key, source, job_id, json.dumps(match, ensure_ascii=False) if match else None, now)
+                     for source, job_id, match in postings if job_id]
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO crawls (criteria_key, search_id, crawled_at) VALUES (?, ?, ?)",
+                    (criteria_key, search_id, now)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+
+WATERMARKS = WatermarkStore()
+
+
+def load_search_history(criteria: Dict) -> Optional[tuple]:
+    """
+    Watermarks and matches of earlier runs for these criteria, as ({source: posting IDs}, [(source, ID, match)]).
+    None when there is nothing to build on, so the search crawls everything.
+    """
+    if not INCREMENTAL_CRAWL:
+        return None
+    try:
+        return WATERMARKS.load(canonical_criteria_key(criteria))
+    except Exception as e:
+        logger.error("Could not load crawl history, running a full crawl: %s", e, exc_info=True)
+        return None
+
+
+def matched_postings(evaluated_jobs: List[Dict], new_matches: List[Dict]) -> List[tuple]:
+    """(source, posting ID, match or None) for every evaluated job, to record with the watermarks"""
+    match_by_posting = {posting_key(match): match for match in new_matches if posting_key(match)}
+    # Matches not tied to a scraped job fall back to their listing
+    match_by_listing = {listing_key(match): match for match in new_matches
+                        if not posting_key(match) and listing_key(match)}
+    postings = []
+    attached = set()
+    for job in evaluated_jobs:
+        match = match_by_posting.get(posting_key(job)) or match_by_listing.get(listing_key(job))
+        if match is not None:
+            attached.add(id(match))
+        postings.append((*posting_mark(job), match))
+    # Matches the LLM returned with a link and title of its own still expire with the rest
+    for match in new_matches:
+        keys = job_keys(match)
+        if id(match) not in attached and keys:
+            postings.append(("", keys[0], match))
+    return postings
+
+
+def merge_matches(new_matches: List[Dict], previous_matches: List[tuple], postings: List[tuple]) -> List[Dict]:
+    """New matches first, followed by earlier ones whose postings were not evaluated again"""
+    evaluated = {(source, job_id) for source, job_id, _ in postings}
+    previous_matches = [match for source, job_id, match in previous_matches if (source, job_id) not in evaluated]
+    merged = list(new_matches)
+    seen = {}
+    for match in new_matches:
+        is_repeat(match, seen)
+    for match in previous_matches:
+        if not is_repeat(match, seen):
+            merged.append(match)
+    return merged
+
+
+# ==================== STARTUP ====================
+
+# Browsers started per scraper during warm-up, 0 disables browser warm-up
+WARMUP_BROWSERS = int(os.getenv("WARMUP_BROWSERS", "1"))
+WARMUP_STATUS: Dict[str, str] = {}
+WARMUP_DONE = asyncio.Event()
+
+
+def warm_imports():
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+
+
+def warm_groq():
+    ensure_groq_api_key()
+    client = get_groq_client()
+    if client.client:
+        # Cheap authenticated call that opens the HTTPS connection pool to the API
+        client.client.models.list()
+
+
+def warm_http_pool():
+    get_http_session().head("https://www.linkedin.com/jobs/search", timeout=5)
+
+
+def warm_gazetteer():
+    if get_gazetteer() is None and os.path.exists(GAZETTEER_PATH):
+        raise RuntimeError(f"Gazetteer index {GAZETTEER_PATH} could not be loaded")
+
+
+def warm_browsers(name: str, options_factory: Callable[[], Any]):
+    if WARMUP_BROWSERS and not DRIVER_POOL.prewarm(name, options_factory, WARMUP_BROWSERS):
+        raise RuntimeError(f"No {name} browser could be started")
+
+
+async def warm_up():
+    """Prepare clients, connection pools and browsers in parallel"""
+    steps = {
+        "imports": warm_imports,
+        "groq": warm_groq,
+        "http_pool": warm_http_pool,
+        "gazetteer": warm_gazetteer,
+        "indeed_browser": lambda: warm_browsers("indeed", IndeedScraper.chrome_options),
+        "glassdoor_browser": lambda: warm_browsers("glassdoor", GlassdoorScraper.chrome_options),
+    }
+
+    async def run(name: str, step: Callable[[], None]):
+        WARMUP_STATUS[name] = "running"
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(step)
+            WARMUP_STATUS[name] = "ok"
+            logger.info("Warm-up step %s finished in %.2fs", name, time.perf_counter() - started)
+        except Exception as e:
+            # Components that failed to warm up are still built lazily on first use
+            WARMUP_STATUS[name] = f"failed: {e}"
+            logger.warning("Warm-up step %s failed: %s", name, e)
+
+    await asyncio.gather(*(run(name, step) for name, step in steps.items()))
+    WARMUP_DONE.set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up_task = asyncio.create_task(warm_up())
+    yield
+    await asyncio.wait([warm_up_task], timeout=30)
+    await asyncio.to_thread(DRIVER_POOL.close)
+    await asyncio.to_thread(RESULT_STORE.close)
+
+
+# Initialize FastAPI app
+app = FastAPI(lifespan=lifespan)
+
+
+@app.get("/ready")
+async def ready():
+    if not WARMUP_DONE.is_set():
+        return JSONResponse(status_code=503, content={"ready": False, "components": WARMUP_STATUS})
+    return {"ready": True, "components": WARMUP_STATUS}
+
+
 # Define the input schema
 class SearchCriteria(BaseModel):
     position: str
@@ -951,107 +2923,258 @@ class SearchCriteria(BaseModel):
     jobNature: str
     location: str
     skills: str
+    # Return only the best N matches, and stop early once N confident ones are found
+    limit: Optional[int] = Field(None, ge=1, le=100)
+
+SEARCH_FLIGHTS = SingleFlight()
+
 
 @app.post("/process_jobs")
 async def process_jobs(search_criteria: SearchCriteria):
+    criteria = search_criteria.dict(exclude_none=True)
     try:
-        logger.info("Starting job processing...")
-
-        # Scraping jobs
-        scraper_linkedin = LinkedInJobScraper()
-        jobs1 = scraper_linkedin.search_jobs(search_criteria.dict(), max_results=25)
-        logger.info(f"LinkedIn scraper returned {len(jobs1)} jobs.")
+        return await SEARCH_FLIGHTS.do(
+            canonical_criteria_key(criteria),
+            lambda: run_in_threadpool(run_job_search, SearchCriteria(**criteria))
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("An unexpected error occurred: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail="An error occurred during job processing.")
 
-        scraper_indeed = IndeedScraper()
-        jobs2 = scraper_indeed.search_jobs(search_criteria.dict())
-        logger.info(f"Indeed scraper returned {len(jobs2)} jobs.")
 
-        scraper_glassdoor = GlassdoorScraper()
-        jobs3 = scraper_glassdoor.search_jobs(search_criteria.dict())
-        logger.info(f"Glassdoor scraper returned {len(jobs3)} jobs.")
+# Upper bound on criteria accepted by one /process_jobs_batch call
+MAX_BATCH_CRITERIA = 50
+# Scrapes one batch runs at once, each of them starts several browsers
+MAX_CONCURRENT_SCRAPES = int(os.getenv("MAX_CONCURRENT_SCRAPES", "2"))
 
-        all_scraped_jobs = jobs1 + jobs2 + jobs3
-        logger.info(f"Total scraped jobs combined: {len(all_scraped_jobs)}")
 
+@app.post("/process_jobs_batch")
+async def process_jobs_batch(criteria_list: List[SearchCriteria]):
+    if len(criteria_list) > MAX_BATCH_CRITERIA:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_CRITERIA} criteria per batch.")
+    try:
+        results = await run_in_threadpool(run_batch_search, [c.dict(exclude_none=True) for c in criteria_list])
+        return {"results": results}
     except Exception as e:
-        logger.error(f"An error occurred during scraping: {e}", exc_info=True)
-        all_scraped_jobs = []
-
-    output_file = "combined_job_matches.json"
-    raw_output_file = "raw_llm_responses.json"
-    batch_size = 3
-
-    all_matches = []
-    client = None
-
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        api_key = "your_groq_api_key"  # Replace with your actual key
-        os.environ["GROQ_API_KEY"] = "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"
+        logger.error("An unexpected error occurred: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail="An error occurred during batch job processing.")
 
-    raw_llm_responses = []
 
+def run_job_search(search_criteria: SearchCriteria):
+    """Scrape all sources and filter the results with the LLM, overlapping the two"""
     try:
-        if not os.getenv("GROQ_API_KEY"):
-            raise HTTPException(status_code=500, detail="GROQ_API_KEY environment variable not set.")
+        result = run_group_search([search_criteria.dict(exclude_none=True)])[0]
+        result.pop("criteria")
+        return result
 
-        client = GroqClient()
+    except Exception as e:
+        logger.error("An unexpected error occurred: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail="An error occurred during job processing.")
 
-        if not client:
-            raise HTTPException(status_code=500, detail="GroqClient failed to initialize.")
 
-        if all_scraped_jobs:
-            batch_count = 0
-            for batch in process_job_batches(all_scraped_jobs, batch_size, source_identifier="scraped_data"):
-                batch_count += 1
-                try:
-                    raw_response_str = client.search_jobs_batch(batch, search_criteria.dict(), raw_responses_collector=raw_llm_responses)
+def run_batch_search(criteria_list: List[Dict]) -> List[Dict]:
+    """Scrape once per distinct scrape key and match every criteria against its group's jobs"""
+    groups: Dict[tuple, List[int]] = {}
+    for index, criteria in enumerate(criteria_list):
+        groups.setdefault(scrape_key(criteria), []).append(index)
+    logger.info("Batch of %s searches needs %s scrapes", len(criteria_list), len(groups))
 
-                    if raw_response_str:
-                        try:
-                            json_data = extract_json_from_llm_response(raw_response_str)
-
-                            if json_data and "relevant_jobs" in json_data:
-                                matches = json_data["relevant_jobs"]
-                                if isinstance(matches, list):
-                                    all_matches.extend(matches)
-                                    logger.info(f"Parsed {len(matches)} relevant matches from batch {batch_count}.")
-                                else:
-                                    logger.warning(f"'relevant_jobs' is not a list in response from batch {batch_count}")
-                            else:
-                                logger.warning(f"Could not extract valid JSON from batch {batch_count}")
-                        except Exception as e:
-                            logger.error(f"Error processing response from batch {batch_count}: {e}", exc_info=True)
-                    else:
-                        logger.warning(f"Empty response string from batch {batch_count}")
+    results: List[Optional[Dict]] = [None] * len(criteria_list)
+    if not groups:
+        return []
 
-                except Exception as e:
-                    logger.error(f"Error during Groq API call for batch {batch_count}: {e}", exc_info=True)
+    with ThreadPoolExecutor(max_workers=min(len(groups), MAX_CONCURRENT_SCRAPES)) as executor:
+        futures = {
+            executor.submit(run_group_search, [criteria_list[i] for i in indexes]): indexes
+            for indexes in groups.values()
+        }
+        for future in as_completed(futures):
+            try:
+                group_results = future.result()
+            except Exception as e:
+                # A failed scrape only fails the searches that shared it
+                logger.error("Search group failed: %s", e, exc_info=True)
+                detail = e.detail if isinstance(e, HTTPException) else "An error occurred during job processing."
+                group_results = [
+                    {"criteria": criteria_list[index], "error": detail, "relevant_jobs": [], "total_matches": 0}
+                    for index in futures[future]
+                ]
+            for index, result in zip(futures[future], group_results):
+                results[index] = result
+    return results
+
+
+def run_group_search(group_requests: List[Dict]) -> List[Dict]:
+    """Scrape once for criteria that share a scrape key and match the shared jobs against each of them"""
+    batch_size = 3
+    # The limit shapes the response only, history and matching work on the criteria themselves
+    limits = [request.get("limit") for request in group_requests]
+    group = [{key: value for key, value in request.items() if key != "limit"} for request in group_requests]
+
+    ensure_groq_api_key()
+    if not os.getenv("GROQ_API_KEY"):
+        raise HTTPException(status_code=500, detail="GROQ_API_KEY environment variable not set.")
+
+    client = get_groq_client()
+
+    if not client:
+        raise HTTPException(status_code=500, detail="GroqClient failed to initialize.")
+
+    logger.info("Starting job processing for %s searches...", len(group))
+    # The whole search must answer by deadline, scrapers get the first part of the budget
+    started = time.monotonic()
+    deadline = started + SEARCH_DEADLINE_SECONDS
+    scrape_deadline = started + SEARCH_DEADLINE_SECONDS * SCRAPE_DEADLINE_SHARE
+    source_statuses: Dict[str, Dict] = {}
+    llm_stats = [{} for _ in group]
+
+    histories = [load_search_history(criteria) for criteria in group]
+    own_watermarks = [
+        {name: CrawlWatermark([history[0].get(name, set())]) for name, _, _ in JOB_SOURCES}
+        if history else None
+        for history in histories
+    ]
+    # Scrapers can only skip postings that every search in the group has already matched
+    watermarks = None
+    if all(histories):
+        watermarks = {
+            name: CrawlWatermark([history[0].get(name, set()) for history in histories])
+            for name, _, _ in JOB_SOURCES
+        }
+        logger.info("Incremental crawl, only postings missed by the previous run are matched")
+
+    # Jobs outside the searched area are settled locally, every search in the group shares the location
+    outside_jobs: List[Dict] = []
+    jobs = filter_by_location(dedupe_jobs(stream_scraped_jobs(
+        shared_scrape_criteria(group), watermarks=watermarks, deadline=scrape_deadline, statuses=source_statuses)),
+        group[0], outside_jobs)
+    raw_llm_responses = [[] for _ in group]
+    evaluated_jobs = [[] for _ in group]
+
+    def unseen(jobs: Iterable[Dict], index: int) -> Iterator[Dict]:
+        """Jobs the search at index has not matched before"""
+        own = own_watermarks[index] or {}
+        for job in jobs:
+            watermark = own.get(job.get("source"))
+            if watermark and watermark.is_known(job):
+                continue
+            yield job
+
+    if len(group) == 1:
+        try:
+            all_matches = [match_job_stream(
+                client, unseen(jobs, 0), group[0], batch_size, raw_llm_responses[0], evaluated_jobs[0],
+                deadline, llm_stats[0], limits[0])]
+        finally:
+            # Stops the scrapers when matching ended before they did
+            jobs.close()
+    else:
+        # Fan the shared stream out to one matcher per criteria, each with its own bounded queue
+        job_queues = [queue.Queue(maxsize=MAX_BUFFERED_JOBS) for _ in group]
 
-        logger.info(f"Job search complete. Total relevant matches: {len(all_matches)}")
+        def drain(job_queue: queue.Queue) -> Iterator[Dict]:
+            while True:
+                try:
+                    job = job_queue.get(timeout=time_left(deadline))
+                except queue.Empty:
+                    return
+                if job is None:
+                    return
+                yield job
+
+        def hand_over(job_queue: queue.Queue, matcher, job: Optional[Dict]):
+            # Give up on a matcher that finished early or ran out of time and stopped reading
+            while not matcher.done():
+                try:
+                    job_queue.put(job, timeout=min(0.5, time_left(deadline) or 0.5))
+                    return
+                except queue.Full:
+                    if time_left(deadline) == 0:
+                        return
+
+        with ThreadPoolExecutor(max_workers=len(group)) as executor:
+            futures = [
+                executor.submit(match_job_stream, client, unseen(drain(job_queue), index), criteria, batch_size,
+                                raw_llm_responses[index], evaluated_jobs[index], deadline, llm_stats[index],
+                                limits[index])
+                for index, (job_queue, criteria) in enumerate(zip(job_queues, group))
+            ]
+            try:
+                for job in jobs:
+                    if all(future.done() for future in futures):
+                        break
+                    for job_queue, future in zip(job_queues, futures):
+                        hand_over(job_queue, future, job)
+            finally:
+                jobs.close()
+                for job_queue, future in zip(job_queues, futures):
+                    hand_over(job_queue, future, None)
+            all_matches = [future.result() for future in futures]
+
+    # Sources stopped because the searches had enough matches are not a failure
+    failed_sources = {
+        name for name, status in source_statuses.items() if status["status"] not in ("ok", "cancelled")}
+    sources = {
+        name: {**source_statuses[name], "circuit": source_breaker(name).state}
+        for name, _, _ in JOB_SOURCES if name in source_statuses
+    }
+    area = resolve_location(group[0].get("location") or "")
+    location = {
+        "place": get_gazetteer().display_name(area) if area else None,
+        "place_id": area.geoname_id if area else None,
+        "filtered_out": len(outside_jobs)
+    }
+
+    results = []
+    for index, criteria in enumerate(group):
+        search_id = uuid.uuid4().hex
+        new_matches = all_matches[index]
+        # Only jobs the LLM or the location filter evaluated become known, the rest are matched on the next run
+        postings = matched_postings(evaluated_jobs[index] + outside_jobs, new_matches)
+        matches = merge_matches(new_matches, histories[index][1], postings) if histories[index] else new_matches
+        # Every match is stored, the limit only trims the response
+        matches = rank_matches(matches)
+        logger.info("Job search complete. Total relevant matches: %s (%s new)", len(matches), len(new_matches))
+        RESULT_STORE.save_search(search_id, criteria, matches, raw_llm_responses[index])
 
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump({"relevant_jobs": all_matches}, f, indent=2, ensure_ascii=False)
-            logger.info(f"Results saved to: {output_file}")
-
+            WATERMARKS.record(canonical_criteria_key(criteria), search_id, postings)
         except Exception as e:
-            logger.error(f"Failed to write results to {output_file}: {e}")
+            logger.error("Could not record crawl watermarks: %s", e, exc_info=True)
+
+        stats = llm_stats[index]
+        partial = bool(failed_sources) or bool(stats.get("failed") or stats.get("timed_out"))
+        if partial:
+            logger.warning("Returning partial results for search %s", search_id)
+        results.append({
+            "search_id": search_id,
+            "criteria": group_requests[index],
+            "relevant_jobs": matches[:limits[index]] if limits[index] else matches,
+            "total_matches": len(matches),
+            "partial": partial,
+            "sources": sources,
+            "location": location,
+            "llm": stats
+        })
+    return results
 
-        try:
-            if raw_llm_responses:
-                with open(raw_output_file, 'w', encoding='utf-8') as f:
-                    json.dump(raw_llm_responses, f, indent=2, ensure_ascii=False)
-                logger.info(f"Raw LLM responses saved to: {raw_output_file}")
 
-        except Exception as e:
-            logger.error(f"Failed to write raw responses to {raw_output_file}: {e}")
+@app.get("/results")
+async def list_results(limit: int = 20):
+    if not 1 <= limit <= MAX_RESULTS_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_RESULTS_LIMIT}.")
+    return {"searches": await run_in_threadpool(RESULT_STORE.list_searches, limit)}
 
-        return {"relevant_jobs": all_matches}
 
-    except Exception as e:
-        logger.error(f"An unexpected error occurred: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="An error occurred during job processing.")
+@app.get("/results/{search_id}")
+async def get_results(search_id: str):
+    result = await run_in_threadpool(RESULT_STORE.get, search_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Search not found.")
+    return result
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,162 @@
+import argparse
+import json
+import random
+import time
+
+from job_fields import FIELD_NORMALIZER
+
+# Snippets stitched together into synthetic descriptions
+FILLER = [
+    "We are looking for a motivated engineer to join our growing product team.",
+    "You will collaborate with designers, QA and other developers on a daily basis.",
+    "Our office is located in the heart of the city with easy access to public transport.",
+    "We offer medical insurance, annual bonuses and a friendly working environment.",
+    "Strong communication skills and a passion for clean code are a must.",
+    "The team currently has 2 backend engineers and 3 frontend engineers.",
+]
+EXPERIENCE = [
+    "{lo}-{hi} years of experience with Python or Java.",
+    "Minimum {lo}+ years relevant work experience.",
+    "Experience: {lo} years in a similar role.",
+    "At least {lo} years experience building web applications.",
+    "Experience required: {lo} yrs.",
+]
+SALARY = [
+    "Salary: PKR {lo},000 - {hi},000 per month.",
+    "Compensation ${lo}K-${hi}K a year.",
+    "Rs. {lo} lakh monthly plus benefits.",
+    "{lo},000 PKR with yearly increments.",
+]
+NATURE = ["This is a remote position.", "Hybrid role, 3 days onsite.", "Work from home is possible.", "On-site only."]
+# Numbers right after words ending in a currency code, none of them is a salary
+NOT_SALARY = [
+    "Working hours 9 to 5, Monday to Friday.",
+    "10+ years 5 days a week in the office.",
+    "We partner with entrepreneurs 50 times a year.",
+    "Our chauffeur 24/7 service covers the city.",
+]
+
+# Phrasings the extraction once got wrong, with the fields they should give
+CASES = [
+    ("Experience required: 3 yrs", {"experience": "3 years"}),
+    ("Minimum 1 years of experience", {"experience": "1 years"}),
+    ("We have 2 years of operations and value guest experience", {"experience": None}),
+    ("Fully remote. Not hybrid", {"jobNature": "remote"}),
+    ("This is not a remote role, hybrid 3 days on-site", {"jobNature": "hybrid"}),
+    ("Non-remote, on-site only", {"jobNature": "onsite"}),
+]
+
+
+def build_corpus(size: int, seed: int = 7):
+    """Generate synthetic job descriptions of realistic length, with the expected minimum experience"""
+    rng = random.Random(seed)
+    corpus = []
+    expected = []
+    for _ in range(size):
+        parts = rng.sample(FILLER, 4)
+        lo = rng.randint(1, 6)
+        expected.append(lo)
+        parts.insert(rng.randint(0, 4), rng.choice(EXPERIENCE).format(lo=lo, hi=lo + rng.randint(1, 3)))
+        if rng.random() < 0.6:
+            amount = rng.randint(50, 300)
+            parts.insert(rng.randint(0, 5), rng.choice(SALARY).format(lo=amount, hi=amount + 50))
+        if rng.random() < 0.8:
+            parts.append(rng.choice(NATURE))
+        corpus.append(" ".join(parts * 3))
+    return corpus, expected
+
+
+def load_corpus(path: str):
+    """Read descriptions from a JSON list or JSONL file of scraped jobs"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            jobs = [json.loads(line) for line in f if line.strip()]
+        else:
+            jobs = json.load(f)
+            if isinstance(jobs, dict):
+                jobs = jobs.get("relevant_jobs", [])
+    return [job.get("description", "") for job in jobs if job.get("description")]
+
+
+def legacy_extract(full_description: str):
+    """The per-term substring scans GlassdoorScraper used before the normalizer"""
+    fields = {"experience": "Not specified", "jobNature": "Not specified"}
+    for term in ["years of experience", "year experience", "years experience"]:
+        if term in full_description.lower():
+            for i in range(15):
+                if f"{i}+" in full_description or f"{i}-" in full_description or f"{i} " in full_description:
+                    fields["experience"] = f"{i} years"
+                    break
+
+    if "remote" in full_description.lower():
+        fields["jobNature"] = "remote"
+    elif "hybrid" in full_description.lower():
+        fields["jobNature"] = "hybrid"
+    elif "on-site" in full_description.lower() or "onsite" in full_description.lower():
+        fields["jobNature"] = "onsite"
+    return fields
+
+
+def check_false_salaries():
+    """Sentences without a salary must not yield one, returns the ones that do"""
+    return [text for text in NOT_SALARY if "salary_min" in FIELD_NORMALIZER.extract(text)]
+
+
+def check_cases():
+    """Returns the CASES whose fields come out differently, with what was extracted"""
+    wrong = []
+    for text, expected in CASES:
+        fields = FIELD_NORMALIZER.extract(text)
+        if any(fields.get(key) != value for key, value in expected.items()):
+            wrong.append((text, fields))
+    return wrong
+
+
+def run(name: str, func, corpus, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [func(text) for text in corpus]
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<12} {best:8.3f}s  {len(corpus) / best:12,.0f} docs/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the job field normalizer")
+    parser.add_argument("--size", type=int, default=50000, help="Number of synthetic descriptions")
+    parser.add_argument("--corpus", help="JSON or JSONL file of scraped jobs to use instead")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus, expected = load_corpus(args.corpus), None
+    else:
+        corpus, expected = build_corpus(args.size)
+    avg_len = sum(len(text) for text in corpus) / max(len(corpus), 1)
+    print(f"Corpus: {len(corpus)} descriptions, {avg_len:.0f} chars on average")
+
+    legacy = run("legacy", legacy_extract, corpus, args.repeat)
+    results = run("normalizer", FIELD_NORMALIZER.extract, corpus, args.repeat)
+
+    found = {key: sum(1 for r in results if key in r) for key in ("experience", "salary_min", "jobNature")}
+    print("Fields found: " + ", ".join(f"{key} {count / len(corpus):.0%}" for key, count in found.items()))
+
+    if expected:
+        legacy_hits = sum(1 for r, lo in zip(legacy, expected) if r["experience"] == f"{lo} years")
+        hits = sum(1 for r, lo in zip(results, expected) if r.get("experience_min") == lo)
+        print(f"Experience accuracy: legacy {legacy_hits / len(corpus):.0%}, normalizer {hits / len(corpus):.0%}")
+
+    false_salaries = check_false_salaries()
+    print(f"False salaries: {len(false_salaries)} of {len(NOT_SALARY)}")
+    for text in false_salaries:
+        print(f"  {text}")
+
+    wrong = check_cases()
+    print(f"Known phrasings wrong: {len(wrong)} of {len(CASES)}")
+    for text, fields in wrong:
+        print(f"  {text!r}: {fields}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import glob
+import math
+import os
+import struct
+import time
+
+# Only the standalone gazetteer module, so building needs neither the app's dependencies nor its stores
+from gazetteer import (
+    GAZETTEER_HEADER,
+    GAZETTEER_MAGIC,
+    GAZETTEER_PATH,
+    GAZETTEER_PLACE,
+    GAZETTEER_SLOT,
+    PLACE_KINDS,
+    Gazetteer,
+    normalize_place_name,
+    place_key_hash,
+)
+
+CITY, REGION, COUNTRY = (PLACE_KINDS.index(kind) for kind in ("city", "region", "country"))
+# Longest name kept as a key, and most places one key may point at
+MAX_KEY_BYTES = 200
+MAX_POSTINGS = 0xFFFF
+
+
+def read_rows(path: str):
+    """Tab separated GeoNames rows, skipping comments"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            yield line.rstrip("\n").split("\t")
+
+
+def load_places(cities_paths, admin1_path: str, countries_path: str, min_population: int, alternate_names: bool):
+    """
+    Places from the GeoNames countryInfo.txt, admin1CodesASCII.txt and cities*.txt dumps.
+    Each place is [geoname_id, parent, country, latitude, longitude, population, name, kind, keys],
+    keys being (name, is_primary) pairs it is looked up by.
+    """
+    places = []
+    countries = {}
+    for row in read_rows(countries_path):
+        code, code3, name, population, geoname_id = row[0], row[1], row[4], row[7], row[16]
+        countries[code] = len(places)
+        keys = [(name, True), (code, False), (code3, False)]
+        places.append([int(geoname_id), -1, len(places), math.nan, math.nan, int(population or 0), name, COUNTRY, keys])
+
+    regions = {}
+    for row in read_rows(admin1_path):
+        code, name, ascii_name, geoname_id = row[:4]
+        country = countries.get(code.split(".")[0])
+        if country is None:
+            continue
+        regions[code] = len(places)
+        places.append([int(geoname_id), country, country, math.nan, math.nan, 0, name, REGION,
+                       [(name, True), (ascii_name, True)]])
+
+    for path in cities_paths:
+        for row in read_rows(path):
+            population = int(row[14] or 0)
+            country = countries.get(row[8])
+            if country is None or population < min_population:
+                continue
+            region = regions.get(f"{row[8]}.{row[10]}")
+            keys = [(row[1], True), (row[2], True)]
+            if alternate_names and row[3]:
+                keys += [(alias, False) for alias in row[3].split(",")]
+            places.append([int(row[0]), country if region is None else region, country,
+                           float(row[4]), float(row[5]), population, row[1], CITY, keys])
+            # Regions have no population in GeoNames, rank them by the cities they hold
+            if region is not None:
+                places[region][5] += population
+    return places
+
+
+def build_keys(places):
+    """
+    Normalized key -> (place indexes, how many of them have it as official name).
+    Official names come before aliases, then cities before regions and countries.
+    """
+    ranked = {}
+    for index, place in enumerate(places):
+        for name, primary in place[8]:
+            key = normalize_place_name(name)
+            if not key or len(key.encode()) > MAX_KEY_BYTES:
+                continue
+            rank = (0 if primary else 1, place[7], -place[5])
+            entries = ranked.setdefault(key, {})
+            if index not in entries or rank < entries[index]:
+                entries[index] = rank
+    keys = {}
+    for key, entries in ranked.items():
+        indexes = sorted(entries, key=entries.get)[:MAX_POSTINGS]
+        keys[key] = indexes, sum(1 for index in indexes if entries[index][0] == 0)
+    return keys
+
+
+def write_index(places, keys, output: str):
+    """Write the header, place records, hash slots, posting lists and string blob in one file"""
+    strings = bytearray()
+    records = bytearray()
+    for geoname_id, parent, country, latitude, longitude, population, name, kind, _ in places:
+        encoded = name.encode()[:0xFFFF]
+        records += GAZETTEER_PLACE.pack(
+            geoname_id, parent, country, latitude, longitude, min(population, 0xFFFFFFFF),
+            len(strings), len(encoded), kind)
+        strings += encoded
+
+    # Open addressing table kept at most half full so probes stay short
+    slot_count = 1 << max(4, (2 * len(keys) - 1).bit_length())
+    slots = [None] * slot_count
+    postings = []
+    for key, (indexes, official) in keys.items():
+        encoded = key.encode()
+        key_hash = place_key_hash(encoded)
+        slot = key_hash % slot_count
+        while slots[slot] is not None:
+            slot = (slot + 1) % slot_count
+        slots[slot] = GAZETTEER_SLOT.pack(key_hash, len(strings), len(encoded), len(indexes), len(postings), official)
+        strings += encoded
+        postings += indexes
+    empty = GAZETTEER_SLOT.pack(0, 0, 0, 0, 0, 0)
+    slot_bytes = b"".join(slot or empty for slot in slots)
+    posting_bytes = struct.pack(f"<{len(postings)}I", *postings)
+
+    places_at = GAZETTEER_HEADER.size
+    slots_at = places_at + len(records)
+    postings_at = slots_at + len(slot_bytes)
+    strings_at = postings_at + len(posting_bytes)
+    header = GAZETTEER_HEADER.pack(
+        GAZETTEER_MAGIC, len(places), slot_count, places_at, slots_at, postings_at, strings_at)
+
+    # Written next to the target and renamed, so running workers never map a half written index
+    temp_path = f"{output}.tmp"
+    with open(temp_path, "wb") as f:
+        for chunk in (header, records, slot_bytes, posting_bytes, strings):
+            f.write(chunk)
+    os.replace(temp_path, output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped location gazetteer from GeoNames dumps")
+    parser.add_argument("--cities", nargs="+", required=True,
+                        help="GeoNames city files such as cities15000.txt, globs allowed")
+    parser.add_argument("--admin1", required=True, help="GeoNames admin1CodesASCII.txt")
+    parser.add_argument("--countries", required=True, help="GeoNames countryInfo.txt")
+    parser.add_argument("--output", default=GAZETTEER_PATH)
+    parser.add_argument("--min-population", type=int, default=0, help="Skip smaller cities")
+    parser.add_argument("--no-alternate-names", action="store_true",
+                        help="Index only the official names of cities, for a smaller file")
+    parser.add_argument("--check", nargs="*", default=[], help="Locations to resolve with the new index")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cities = sorted({path for pattern in args.cities for path in glob.glob(pattern)})
+    places = load_places(cities, args.admin1, args.countries, args.min_population, not args.no_alternate_names)
+    keys = build_keys(places)
+    write_index(places, keys, args.output)
+    size = os.path.getsize(args.output)
+    print(f"Indexed {len(places)} places under {len(keys)} names in {time.perf_counter() - start:.1f}s, "
+          f"{args.output} is {size / 1e6:.1f} MB")
+
+    if args.check:
+        gazetteer = Gazetteer(args.output)
+        for text in args.check:
+            place = gazetteer.resolve(text)
+            if place is None:
+                print(f"{text!r:<40} not found")
+                continue
+            hierarchy = " < ".join(p.name for p in [place] + gazetteer.ancestors(place))
+            # Searches only rewrite and filter on locations that can mean a single place
+            note = "" if gazetteer.resolve(text, unambiguous=True) else "  (ambiguous, left to the LLM)"
+            print(f"{text!r:<40} {place.kind} {place.geoname_id}: {hierarchy}{note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Memory-mapped location gazetteer. The index is built offline by build_gazetteer.py and read by Search.py.
+Kept free of the app's imports so the builder runs without FastAPI, browsers or the app's stores.
+"""
+import hashlib
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import unicodedata
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+# Place index built offline by build_gazetteer.py, searches leave locations to the LLM when it is missing
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", "gazetteer.idx")
+
+# Index file layout. Offsets count from the start of the file.
+GAZETTEER_MAGIC = b"CQGAZ002"
+# magic, place count, slot count, places offset, slots offset, postings offset, strings offset
+GAZETTEER_HEADER = struct.Struct("<8sIIQQQQ")
+# GeoNames ID, parent place, country place, latitude, longitude, population, name offset, name length, kind
+GAZETTEER_PLACE = struct.Struct("<IiiffIIHBx")
+# Open addressing slot: key hash, key offset, key length, posting count, first posting, postings that are
+# official names rather than aliases (they come first)
+GAZETTEER_SLOT = struct.Struct("<QIHHIH2x")
+PLACE_KINDS = ("city", "region", "country")
+
+# Words that decorate a location without naming a place, e.g. "Greater Lahore Area" or "Pakistan (Remote)"
+PLACE_NOISE_WORDS = {"greater", "area", "metropolitan", "metro", "region", "division", "district",
+                     "remote", "hybrid", "onsite", "on", "site"}
+PLACE_SEPARATOR_RE = re.compile(r"[\W_]+")
+
+
+def normalize_place_name(name: str) -> str:
+    """Index key for a place name, lower case without accents or punctuation so "São Paulo" and "Sao Paulo" share it"""
+    text = "".join(char for char in unicodedata.normalize("NFKD", str(name)) if not unicodedata.combining(char))
+    return " ".join(PLACE_SEPARATOR_RE.sub(" ", text.casefold()).split())
+
+
+def place_key_hash(key: bytes) -> int:
+    """Hash of a normalized name, stable across processes unlike hash()"""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+@dataclass(frozen=True)
+class Place:
+    index: int
+    geoname_id: int
+    name: str
+    kind: str
+    latitude: float
+    longitude: float
+    population: int
+    # Index of the region or country the place belongs to, -1 for countries
+    parent: int
+    country: int
+
+
+class Gazetteer:
+    """
+    Memory-mapped index of cities, regions and countries by normalized name.
+    A lookup hashes straight to its slot and reads only the pages it needs, and every worker shares the mapping.
+    """
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        self.logger = logging.getLogger("Gazetteer")
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.place_count, self.slot_count, self.places_at, self.slots_at,
+         self.postings_at, self.strings_at) = GAZETTEER_HEADER.unpack_from(self.data, 0)
+        if magic != GAZETTEER_MAGIC:
+            self.data.close()
+            raise ValueError(f"{path} is not a gazetteer index of this version, rebuild it with build_gazetteer.py")
+        self.logger.info("Gazetteer %s loaded with %s places", path, self.place_count)
+
+    def _string(self, offset: int, length: int) -> bytes:
+        start = self.strings_at + offset
+        return self.data[start:start + length]
+
+    def _lookup(self, name: str) -> Tuple[List[int], int]:
+        """Indexes of the places called name, most likely first, and how many of them carry it as official name"""
+        key = normalize_place_name(name).encode()
+        if not key:
+            return [], 0
+        key_hash = place_key_hash(key)
+        slot = key_hash % self.slot_count
+        while True:
+            slot_hash, key_at, key_length, count, first, official = GAZETTEER_SLOT.unpack_from(
+                self.data, self.slots_at + slot * GAZETTEER_SLOT.size)
+            if not count:
+                return [], 0
+            if slot_hash == key_hash and self._string(key_at, key_length) == key:
+                return list(struct.unpack_from(f"<{count}I", self.data, self.postings_at + first * 4)), official
+            slot = (slot + 1) % self.slot_count
+
+    def lookup(self, name: str) -> List[int]:
+        """Indexes of the places called name, most likely first"""
+        return self._lookup(name)[0]
+
+    def place(self, index: int) -> Place:
+        (geoname_id, parent, country, latitude, longitude, population,
+         name_at, name_length, kind) = GAZETTEER_PLACE.unpack_from(self.data, self.places_at + index * GAZETTEER_PLACE.size)
+        return Place(index, geoname_id, self._string(name_at, name_length).decode(), PLACE_KINDS[kind],
+                     latitude, longitude, population, parent, country)
+
+    def ancestors(self, place: Place) -> List[Place]:
+        """Region and country containing place, nearest first"""
+        chain = []
+        parent = place.parent
+        while parent >= 0:
+            chain.append(self.place(parent))
+            parent = chain[-1].parent
+        return chain
+
+    def resolve(self, text: str, unambiguous: bool = False, max_candidates: int = 50) -> Optional[Place]:
+        """
+        Canonical place for free text such as "Lahore, Punjab, Pakistan" or "Greater Karachi Area" in a listing.
+        Later parts pick between places sharing a name, "Hyderabad, Pakistan" vs "Hyderabad, India". With
+        unambiguous, text that still fits unrelated places, like a bare "Hyderabad", resolves to None.
+        """
+        parts = [part for part in map(normalize_place_name, str(text).split(",")) if part]
+        for position, part in enumerate(parts):
+            candidates, official = self._lookup(part)
+            if not candidates:
+                candidates, official = self._lookup(
+                    " ".join(word for word in part.split() if word not in PLACE_NOISE_WORDS))
+            if not candidates:
+                continue
+
+            context = [set(ids) for ids in map(self.lookup, parts[position + 1:]) if ids]
+            scored = []
+            for rank, index in enumerate(candidates[:max_candidates]):
+                place = self.place(index)
+                containing = {ancestor.index for ancestor in self.ancestors(place)}
+                scored.append((sum(1 for ids in context if ids & containing), rank < official, place))
+                if not unambiguous and scored[-1][0] == len(context):
+                    break
+            best_hits = max(hits for hits, _, _ in scored)
+            best = next(place for hits, _, place in scored if hits == best_hits)
+            if unambiguous:
+                # Aliases in other languages are too loose to make an official name ambiguous
+                rivals = [place for hits, is_official, place in scored
+                          if hits == best_hits and (is_official or not official)]
+                if any(not self.contains(rival, best) and not self.contains(best, rival) for rival in rivals):
+                    return None
+            return best
+        return None
+
+    def display_name(self, place: Place) -> str:
+        """Short canonical name, "City, Country", used in scraper URLs"""
+        if place.country < 0 or place.country == place.index:
+            return place.name
+        return f"{place.name}, {self.place(place.country).name}"
+
+    def contains(self, outer: Place, inner: Place) -> bool:
+        return outer.index == inner.index or any(ancestor.index == outer.index for ancestor in self.ancestors(inner))
+
+    @staticmethod
+    def distance_km(a: Place, b: Place) -> float:
+        """Great-circle distance, infinite for regions and countries which have no coordinates"""
+        if math.isnan(a.latitude) or math.isnan(b.latitude):
+            return math.inf
+        lat1, lon1, lat2, lon2 = map(math.radians, (a.latitude, a.longitude, b.latitude, b.longitude))
+        h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        return 2 * 6371.0 * math.asin(math.sqrt(min(1.0, h)))
+
+    def within(self, area: Place, place: Place, radius_km: float) -> bool:
+        """Whether a job at place is in the searched area: inside it, near the searched city, or listed more broadly"""
+        if self.contains(area, place) or self.contains(place, area):
+            return True
+        return self.distance_km(area, place) <= radius_km
@@ -0,0 +1,187 @@
+"""
+Experience, salary and job nature extraction from job text, used by the scrapers in Search.py.
+Kept free of the app's imports so bench_normalizer.py runs without FastAPI, browsers or the app's stores.
+"""
+import re
+from typing import Any, Dict, Iterator, Optional
+
+
+class JobFieldNormalizer:
+    """Extracts experience, salary and job nature from job text, each with its own small pattern"""
+
+    CURRENCIES = {
+        "$": "USD", "us$": "USD", "usd": "USD",
+        "rs": "PKR", "rs.": "PKR", "pkr": "PKR",
+        "€": "EUR", "eur": "EUR",
+        "£": "GBP", "gbp": "GBP",
+        "aed": "AED", "inr": "INR"
+    }
+
+    PERIODS = {
+        "hour": "hour", "hr": "hour", "hourly": "hour",
+        "day": "day", "daily": "day",
+        "week": "week", "weekly": "week",
+        "month": "month", "mo": "month", "monthly": "month",
+        "year": "year", "yr": "year", "annum": "year", "annually": "year", "yearly": "year"
+    }
+
+    MULTIPLIERS = {"k": 1_000, "m": 1_000_000, "lac": 100_000, "lacs": 100_000, "lakh": 100_000, "lakhs": 100_000}
+
+    # Words every mention of a field contains. They are found with plain substring search and each
+    # pattern only runs in a short window around them, so text without them costs almost nothing.
+    CURRENCY_WORDS = ("$", "€", "£", "pkr", "usd", "eur", "gbp", "aed", "inr", "rs")
+    CURRENCY_CODES = ("pkr", "usd", "eur", "gbp", "aed", "inr")
+    # Hybrid wins over remote and remote over onsite when a description mentions more than one.
+    # "work from home" ends in "home", "on-site" and "in-office" in "site" and "office".
+    NATURE_WORDS = (("hybrid", "hybrid"), ("remote", "remote"), ("wfh", "remote"), ("home", "remote"),
+                    ("site", "onsite"), ("office", "onsite"))
+    # How far a pattern may reach back from its word, "10-15 years of relevant work experience"
+    WINDOW = 60
+
+    def __init__(self):
+        number = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?"
+        currency = r"us\$|\$|€|£|pkr|usd|eur|gbp|aed|inr|rs\.?"
+        multiplier = r"(?:k|m|lakhs?|lacs?)\b"
+        years = r"(?:years?|yrs?)'?"
+        span = r"(?P<lo>\d{1,2})\s*(?P<plus>\+)?\s*(?:(?:-|–|to)\s*(?P<hi>\d{1,2})\s*\+?\s*)?"
+        period = (
+            r"(?:\s*(?:per|/|a|an)\s*(?P<period>hour|hr|day|week|month|mo|year|yr|annum)\b"
+            r"|\s*(?P<period_adj>hourly|daily|weekly|monthly|yearly|annually)\b)?"
+        )
+
+        # "2-4 years of experience", "3+ yrs relevant work experience", "5 years of Python experience".
+        # The words in between may not join clauses, "2 years of operations and guest experience".
+        self.years_then_experience = re.compile(
+            rf"(?<![\w.]){span}{years}\s+(?:of\s+)?"
+            r"(?:(?!(?:and|or|in|at|with|for|to|the|our|we|you|of)\b)[a-z+#/-]+(?:\.[a-z]+)*\s+){0,2}experience"
+        )
+        # "experience: 2-3 years", "experience of at least 5 years", "experience required: 3 yrs"
+        self.experience_then_years = re.compile(rf"experience\b[^.;\n\d]{{0,30}}?{span}{years}(?![a-z])")
+        # "PKR 150,000 - 200,000 per month", "$90K-$120K", "Rs. 1.5 lakh monthly"
+        self.salary_pattern = re.compile(
+            rf"(?P<cur>{currency})\s*(?P<lo>{number})\s*(?P<lo_mult>{multiplier})?"
+            rf"(?:\s*(?:-|–|to)\s*(?:{currency})?\s*(?P<hi>{number})\s*(?P<hi_mult>{multiplier})?)?{period}"
+        )
+        # "150,000 - 200,000 PKR"
+        self.trailing_code_pattern = re.compile(
+            rf"(?<![\d,.])(?P<lo>{number})\s*(?P<lo_mult>{multiplier})?(?:\s*(?:-|–|to)\s*(?P<hi>{number})\s*"
+            rf"(?P<hi_mult>{multiplier})?)?\s*(?P<cur>pkr|usd|eur|gbp|aed|inr)"
+        )
+        # Matched backwards from the end of its word
+        self.nature_pattern = re.compile(r"(?<![a-z])(?:hybrid|remote|work\s+from\s+home|wfh|on-?site|in-?office)$")
+        # "Not hybrid", "this is not a remote role" and "non-remote" rule a nature out rather than in
+        self.negation_pattern = re.compile(r"(?<![a-z])(?:not|no|non|never|without)[\s-]+(?:(?:a|an|fully|100%)\s+)?$")
+
+    @staticmethod
+    def _occurrences(text: str, word: str) -> Iterator[int]:
+        """Positions where word starts a word of text, anywhere for a symbol such as $"""
+        index = text.find(word)
+        while index >= 0:
+            if not index or not word[0].isalpha() or not text[index - 1].isalpha():
+                yield index
+            index = text.find(word, index + 1)
+
+    def _amount(self, number: str, multiplier: Optional[str]) -> float:
+        value = float(number.replace(",", ""))
+        if multiplier:
+            value *= self.MULTIPLIERS[multiplier]
+        return value
+
+    def _experience(self, text: str) -> Dict[str, Any]:
+        """The first experience requirement in text"""
+        for index in self._occurrences(text, "experience"):
+            match = (self.years_then_experience.search(text, max(0, index - self.WINDOW), index + 10)
+                     or self.experience_then_years.match(text, index))
+            if not match:
+                continue
+            low, high, plus = int(match["lo"]), match["hi"], match["plus"]
+            if high:
+                label = f"{low}-{high} years"
+            elif plus:
+                label = f"{low}+ years"
+            else:
+                label = f"{low} years"
+            return {
+                "experience_min": low,
+                "experience_max": int(high) if high else (None if plus else low),
+                "experience": label,
+            }
+        return {}
+
+    def _salary(self, text: str, original: str) -> Dict[str, Any]:
+        """The first salary in text, the currency starting a word so "hours 9" is not read as rupees"""
+        found = None
+        for word in self.CURRENCY_WORDS:
+            if word not in text:
+                continue
+            for index in self._occurrences(text, word):
+                if found is not None and index > found.start() + self.WINDOW:
+                    break
+                start = index - 2 if word == "$" and text[max(0, index - 2):index] == "us" else index
+                match = self.salary_pattern.match(text, start)
+                if match is None and word in self.CURRENCY_CODES:
+                    match = self.trailing_code_pattern.search(text, max(0, index - self.WINDOW), index + len(word))
+                if match and (found is None or match.start() < found.start()):
+                    found = match
+                if match:
+                    break
+        if found is None:
+            return {}
+
+        groups = found.groupdict()
+        low = self._amount(groups["lo"], groups["lo_mult"])
+        high = groups["hi"] and self._amount(groups["hi"], groups["hi_mult"] or groups["lo_mult"])
+        period = groups.get("period") or groups.get("period_adj")
+        return {
+            "salary_min": low,
+            "salary_max": high or low,
+            "salary_currency": self.CURRENCIES.get(groups["cur"], groups["cur"].upper()),
+            "salary_period": self.PERIODS[period] if period else None,
+            "salary_text": original[found.start():found.end()].strip(),
+        }
+
+    def _nature(self, text: str) -> Optional[str]:
+        """The job nature text settles on, ignoring the ones it rules out"""
+        # Words are in priority order, so the first one mentioned without a negation decides
+        for word, nature in self.NATURE_WORDS:
+            index = text.find(word)
+            while index >= 0:
+                end = index + len(word)
+                match = not text[end:end + 1].isalpha() and self.nature_pattern.search(text, max(0, index - 16), end)
+                if match and not self.negation_pattern.search(text, max(0, match.start() - 24), match.start()):
+                    return nature
+                index = text.find(word, index + 1)
+        return None
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Return whatever experience, salary and job nature fields text mentions"""
+        # Text is lower-cased once up front, which is much cheaper than IGNORECASE matching
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # A few non-ASCII characters change length when lower-cased, keep spans aligned
+            text = lowered
+
+        fields = self._experience(lowered)
+        fields.update(self._salary(lowered, text))
+        nature = self._nature(lowered)
+        if nature:
+            fields["jobNature"] = nature
+        return fields
+
+    def normalize(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Update a scraped job in place with normalized fields, keeping existing values when nothing is found"""
+        salary = job.get("salary") or ""
+        if salary == "Not specified":
+            salary = ""
+        # The card's own salary text comes first so it wins over figures in the description
+        fields = self.extract(f"{salary}\n{job.get('description') or ''}")
+
+        salary_text = fields.pop("salary_text", None)
+        if salary_text and not salary:
+            job["salary"] = salary_text
+
+        job.update(fields)
+        return job
+
+
+FIELD_NORMALIZER = JobFieldNormalizer()
@@ -0,0 +1,323 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER = (
+    "We are looking for a motivated engineer to join our growing product team. "
+    "You will collaborate with designers, QA and other developers on a daily basis. "
+)
+
+
+class FakeScraper:
+    """Stands in for a real scraper, yielding synthetic jobs after a fixed delay each"""
+
+    def __init__(self, source: str, jobs: int, latency: float, description_chars: int):
+        self.source = source
+        self.jobs = jobs
+        self.latency = latency
+        self.description = (FILLER * (description_chars // len(FILLER) + 1))[:description_chars]
+
+    def iter_jobs(self, criteria, **kwargs):
+        for i in range(self.jobs):
+            time.sleep(self.latency)
+            yield {
+                "job_title": f"{criteria.get('position')} {i}",
+                "company": f"{self.source} Company {i}",
+                "location": criteria.get("location", ""),
+                "apply_link": f"https://{self.source.lower()}.example/{criteria.get('position')}/{i}",
+                "source": self.source,
+                "salary": "Not specified",
+                "experience": "2 years",
+                "jobNature": criteria.get("jobNature", ""),
+                "description": self.description,
+            }
+
+    def close(self):
+        pass
+
+
+class FakeGroqClient:
+    """
+    Answers batches like the LLM would, after a fixed delay, marking a share of the jobs relevant.
+    With screening on, the small model settles a share of the jobs and the rest are escalated.
+    """
+
+    def __init__(self, latency: float, match_rate: float, screen_latency: float, screen_confident: float):
+        self.latency = latency
+        self.match_rate = match_rate
+        self.screen_latency = screen_latency
+        self.screen_confident = screen_confident
+        self.cascade_enabled = screen_confident > 0
+        self.structured_output = True
+
+    def screen_jobs_batch(self, jobs_data, search_criteria, raw_responses_collector):
+        from Search import ScreenVerdict
+        time.sleep(self.screen_latency)
+        return [
+            ScreenVerdict(index=index, relevant=random.random() < self.match_rate, confidence=0.95)
+            if random.random() < self.screen_confident else None
+            for index in range(len(jobs_data))
+        ]
+
+    def search_jobs_batch(self, jobs_data, search_criteria, raw_responses_collector):
+        time.sleep(self.latency)
+        matches = [job for job in jobs_data if random.random() < self.match_rate]
+        response = json.dumps({"relevant_jobs": matches})
+        raw_responses_collector.append(response)
+        return response
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """
+    OpenAI-style chat completions endpoint for the real GroqClient, reached through GROQ_BASE_URL.
+    Settings are class attributes, set by start_stub_server.
+    """
+    latency = 0.5
+    screen_latency = 0.1
+    screen_model = ""
+    match_rate = 0.3
+    screen_confident = 0.7
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        prompt = body["messages"][-1]["content"]
+
+        if body["model"] == self.screen_model:
+            time.sleep(self.screen_latency)
+            verdicts = [
+                {"index": index, "relevant": random.random() < self.match_rate,
+                 "confidence": 0.99 if random.random() < self.screen_confident else 0.5}
+                for index in range(prompt.count('"index": '))
+            ]
+            content = json.dumps({"verdicts": verdicts})
+        else:
+            time.sleep(self.latency)
+            listings = prompt.split("(JSON array):\n", 1)[1].split("\n\nHere are the search criteria", 1)[0]
+            matches = [job for job in json.loads(listings) if random.random() < self.match_rate]
+            content = json.dumps({"relevant_jobs": matches})
+
+        payload = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(args) -> ThreadingHTTPServer:
+    StubLLMHandler.latency = args.llm_latency
+    StubLLMHandler.screen_latency = args.screen_latency
+    StubLLMHandler.screen_model = os.environ.get("GROQ_SCREEN_MODEL", "llama-3.1-8b-instant")
+    StubLLMHandler.match_rate = args.match_rate
+    StubLLMHandler.screen_confident = args.screen_confident
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubLLMHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def rss_mb() -> float:
+    """Current resident memory of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        # Peak instead of current where /proc is not available (KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if peak > 1 << 30 else peak / 1024
+
+
+def load_app(args, workdir: str):
+    """Import the app in a scratch directory with every external dependency replaced by a fake"""
+    # Workers share the directory, so they coalesce searches through one SQLite file like uvicorn workers
+    os.chdir(workdir)
+    os.environ.setdefault("GROQ_API_KEY", "load-test")
+    os.environ["JOB_LOG_SAMPLE_RATE"] = "0"
+    if not args.incremental:
+        os.environ["INCREMENTAL_CRAWL"] = "0"
+    if args.stub_server:
+        os.environ["GROQ_API_KEY"] = "load-test"
+        if not args.screen_confident:
+            os.environ["GROQ_SCREEN_MODEL"] = ""
+        server = start_stub_server(args)
+        os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    import Search
+    logging.getLogger().setLevel(logging.WARNING)
+
+    Search.JOB_SOURCES = [
+        (name, lambda name=name: FakeScraper(name, args.jobs, args.scrape_latency, args.description_chars), {})
+        for name in ("LinkedIn", "Indeed", "Glassdoor")[:args.sources]
+    ]
+    if not args.stub_server:
+        client = FakeGroqClient(args.llm_latency, args.match_rate, args.screen_latency, args.screen_confident)
+        Search.get_groq_client = lambda: client
+    return Search
+
+
+def build_criteria(index: int, args) -> dict:
+    # Identical criteria are coalesced by the app, distinct_queries controls how often that happens
+    query = index % args.distinct_queries if args.distinct_queries else index
+    return {
+        "position": f"Engineer {query}",
+        "experience": "2 years",
+        "salary": "100,000 PKR",
+        "jobNature": "remote",
+        "location": "Islamabad",
+        "skills": "Python, FastAPI",
+    }
+
+
+async def monitor(stop: asyncio.Event, lags: list, memory: list, interval: float = 0.05):
+    """Sample event-loop lag (how late a timed sleep wakes up) and resident memory"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - start - interval))
+        memory.append(rss_mb())
+
+
+async def drive(args, workdir: str, worker: int, offset: int, share: int) -> dict:
+    import httpx
+
+    Search = load_app(args, workdir)
+    latencies = []
+    errors = 0
+    lags = []
+    memory = [rss_mb()]
+    stop = asyncio.Event()
+
+    transport = httpx.ASGITransport(app=Search.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+
+        async def one(index: int):
+            nonlocal errors
+            start = time.perf_counter()
+            try:
+                response = await client.post("/process_jobs", json=build_criteria(offset + index, args))
+                if response.status_code != 200:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+        monitor_task = asyncio.create_task(monitor(stop, lags, memory))
+        started = time.perf_counter()
+
+        if args.rate:
+            # Open loop, requests arrive as a Poisson process whatever the response times
+            tasks = []
+            for index in range(share):
+                tasks.append(asyncio.create_task(one(index)))
+                await asyncio.sleep(random.expovariate(args.rate / args.workers))
+            await asyncio.gather(*tasks)
+        else:
+            # Closed loop, each client sends its next request once the previous one answered
+            counter = iter(range(share))
+
+            async def client_loop():
+                for index in counter:
+                    await one(index)
+
+            await asyncio.gather(*(client_loop() for _ in range(max(1, args.concurrency // args.workers))))
+
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await monitor_task
+
+    Search.RESULT_STORE.close()
+    return {
+        "worker": worker,
+        "latencies": latencies,
+        "errors": errors,
+        "elapsed": elapsed,
+        "lags": lags,
+        "rss_start": memory[0],
+        "rss_peak": max(memory),
+    }
+
+
+def run_worker(job):
+    return asyncio.run(drive(*job))
+
+
+def report(args, results):
+    latencies = [value for result in results for value in result["latencies"]]
+    lags = [value for result in results for value in result["lags"]]
+    errors = sum(result["errors"] for result in results)
+    elapsed = max(result["elapsed"] for result in results)
+
+    mode = f"{args.rate:g} req/s arrivals" if args.rate else f"{args.concurrency} concurrent clients"
+    print(f"Requests: {len(latencies)} ({errors} errors) over {elapsed:.2f}s, {mode}, {args.workers} worker(s)")
+    print(f"Throughput: {len(latencies) / elapsed:.2f} req/s")
+    print("Latency:    " + "  ".join(
+        f"p{pct} {percentile(latencies, pct) * 1000:8.0f}ms" for pct in (50, 95, 99)
+    ) + f"  max {max(latencies) * 1000:8.0f}ms")
+    print("Loop lag:   " + "  ".join(
+        f"p{pct} {percentile(lags, pct) * 1000:8.1f}ms" for pct in (50, 95, 99)
+    ) + f"  max {max(lags, default=0) * 1000:8.1f}ms")
+    for result in sorted(results, key=lambda r: r["worker"]):
+        print(f"Worker {result['worker']}: RSS {result['rss_start']:.0f}MB at start, {result['rss_peak']:.0f}MB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /process_jobs in-process with fake scrapers and LLM")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent clients in closed-loop mode")
+    parser.add_argument("--rate", type=float, default=0, help="Open-loop arrival rate in req/s, overrides --concurrency")
+    parser.add_argument("--workers", type=int, default=1, help="App processes, each with its own share of the load")
+    parser.add_argument("--distinct-queries", type=int, default=0,
+                        help="Cycle through this many distinct criteria, 0 makes every request unique")
+    parser.add_argument("--sources", type=int, default=3, choices=(1, 2, 3), help="Number of fake scrapers")
+    parser.add_argument("--jobs", type=int, default=10, help="Jobs each fake scraper returns")
+    parser.add_argument("--scrape-latency", type=float, default=0.05, help="Seconds per scraped job")
+    parser.add_argument("--description-chars", type=int, default=2000)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per LLM batch")
+    parser.add_argument("--match-rate", type=float, default=0.3, help="Share of jobs the fake LLM marks relevant")
+    parser.add_argument("--screen-latency", type=float, default=0.1, help="Seconds per screening batch")
+    parser.add_argument("--screen-confident", type=float, default=0.7,
+                        help="Share of jobs the screening model is sure about, 0 turns screening off")
+    parser.add_argument("--stub-server", action="store_true",
+                        help="Run the real Groq client against a local HTTP stub instead of a fake client")
+    parser.add_argument("--incremental", action="store_true", help="Leave incremental crawling on")
+    args = parser.parse_args()
+
+    shares = [args.requests // args.workers + (1 if i < args.requests % args.workers else 0)
+              for i in range(args.workers)]
+    workdir = tempfile.mkdtemp(prefix="career-quest-load-")
+    jobs = [(args, workdir, worker, sum(shares[:worker]), share) for worker, share in enumerate(shares)]
+
+    if args.workers == 1:
+        results = [run_worker(jobs[0])]
+    else:
+        with multiprocessing.get_context("spawn").Pool(args.workers) as pool:
+            results = pool.map(run_worker, jobs)
+    report(args, results)
+
+
+if __name__ == "__main__":
+    main()
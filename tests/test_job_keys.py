@@ -0,0 +1,50 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="module")
+def search(tmp_path_factory):
+    # Importing the app opens its log and stores in the working directory
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("app"))
+    try:
+        yield importlib.import_module("Search")
+    finally:
+        os.chdir(cwd)
+
+
+def indeed_job(jk: str, title: str = "Python Developer") -> dict:
+    return {
+        "job_title": title,
+        "company": "Acme",
+        "location": "Lahore, Punjab",
+        "apply_link": f"https://pk.indeed.com/rc/clk?jk={jk}&from=vj",
+        "source": "Indeed",
+    }
+
+
+def test_postings_differing_only_in_jk_are_kept(search):
+    jobs = [indeed_job("1a2b3c"), indeed_job("4d5e6f")]
+    assert len(search.job_keys(jobs[0])) == 2
+    assert search.job_keys(jobs[0])[0] != search.job_keys(jobs[1])[0]
+    assert list(search.dedupe_jobs(jobs)) == jobs
+
+
+def test_same_posting_and_cross_source_listing_are_dropped(search):
+    linkedin = dict(indeed_job("unused"), apply_link="https://www.linkedin.com/jobs/view/42", source="LinkedIn")
+    jobs = [indeed_job("1a2b3c"), indeed_job("1a2b3c"), linkedin]
+    assert list(search.dedupe_jobs(jobs)) == jobs[:1]
+
+
+def test_matches_attach_to_their_own_posting(search):
+    jobs = [indeed_job("1a2b3c"), indeed_job("4d5e6f")]
+    match = search.score_match(dict(jobs[1]), jobs[1], {"position": "Python Developer"}, 0.9)
+    postings = search.matched_postings(jobs, [match])
+    assert [(source, job_id, found is not None) for source, job_id, found in postings] == [
+        ("Indeed", "1a2b3c", False), ("Indeed", "4d5e6f", True)]
+    assert search.merge_matches([], [("Indeed", "1a2b3c", dict(jobs[0]))], postings[1:]) == [jobs[0]]